@@ -3,99 +3,24 @@ PDF Form Filler Application
 Batch-fill PDF forms using CSV templates
 """
 
-import streamlit as st
+import json
+import time
+import zipfile
+from contextlib import nullcontext
 import pandas as pd
-from io import BytesIO
-from typing import Dict, List
-from PIL import Image
+import streamlit as st
 
 # Import modules
-from config.settings import AppConfig, PDFConfig, ExportConfig
-from src.models.form_template import FormTemplate
+from config.settings import AppConfig, PDFConfig, GenerationConfig, ExportConfig, MetricsConfig
 from src.core.pdf_processor import PDFProcessor
-from src.core.coordinate_utils import CoordinateUtils
+from src.core.page_source import LazyPageSource
+from src.core.background_cache import BackgroundCache
+from src.core.job_runner import ACTIVE_STATUSES, JobInputs, job_runner
 from src.io.template_loader import TemplateLoader
 from src.io.spreadsheet_processor import SpreadsheetProcessor
-from src.utils.text_utils import TextUtils
-from src.utils.file_utils import FileUtils
-
-# ReportLab imports
-try:
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib.utils import ImageReader
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-
-
-# ============================================================================
-# PDF GENERATION
-# ============================================================================
-
-class PDFGenerator:
-    """Generate filled PDFs"""
-    
-    @staticmethod
-    def create_filled_pdf(pdf_images: List[Image.Image],
-                         template: FormTemplate,
-                         field_data: Dict[str, any]) -> BytesIO:
-        
-        """Create PDF with overlaid data"""
-        
-        if not REPORTLAB_AVAILABLE:
-            raise ImportError("ReportLab required")
-        
-        pdf_buffer = BytesIO()
-        c = canvas.Canvas(pdf_buffer, pagesize=letter)
-        page_width, page_height = letter
-        
-        for page_idx, page_img in enumerate(pdf_images):
-            
-            # Draw background image
-            img_reader = ImageReader(page_img)
-            img_width, img_height = page_img.size
-            
-            scale = min(page_width / img_width, page_height / img_height)
-            scaled_width = img_width * scale
-            scaled_height = img_height * scale
-            
-            x_offset = (page_width - scaled_width) / 2
-            y_offset = (page_height - scaled_height) / 2
-            
-            c.drawImage(img_reader, x_offset, y_offset,
-                       width=scaled_width, height=scaled_height)
-            
-            # Overlay field data
-            page_fields = template.get_fields_by_page(page_idx)
-            
-            for field in page_fields:
-                if field.field_name in field_data:
-                    value = field_data[field.field_name]
-                    formatted = TextUtils.format_value(value, field.field_type.value)
-                    
-                    if formatted:
-                        if field.max_width:
-                            formatted = TextUtils.truncate_to_width(
-                                formatted, field.max_width, field.font_size
-                            )
-                        
-                        pdf_x, pdf_y = CoordinateUtils.image_to_pdf(
-                            field.x, field.y, img_height, page_height
-                        )
-                        
-                        pdf_x = pdf_x + x_offset
-                        pdf_y = pdf_y + y_offset
-                        
-                        c.setFont(field.font_name, field.font_size)
-                        c.setFillColorRGB(0, 0, 0)
-                        c.drawString(pdf_x, pdf_y, formatted)
-            
-            c.showPage()
-        
-        c.save()
-        pdf_buffer.seek(0)
-        return pdf_buffer
+from src.utils.archive_writer import ArchiveStats
+from src.utils.cache_utils import ContentCache, upload_cache
+from src.utils.metrics import MetricsRegistry
 
 
 # ============================================================================
@@ -106,10 +31,13 @@ def init_session_state():
     """Initialize session state"""
     defaults = {
         'template': None,
-        'pdf_images': None,
+        'pdf_pages': None,
+        'pdf_bytes': None,
         'loaded_data': None,
         'processed_data': None,
-        'column_field_mapping': {}
+        'column_field_mapping': {},
+        # Timings of upload processing; each batch's report starts from these
+        'upload_metrics': MetricsRegistry() if MetricsConfig.ENABLED else None
     }
     
     for key, value in defaults.items():
@@ -142,10 +70,18 @@ def render_upload_section():
         
         if pdf_file:
             try:
-                processor = PDFProcessor(dpi=PDFConfig.DPI)
-                images = processor.pdf_to_images(pdf_file.read())
-                st.session_state.pdf_images = images
-                st.success(f"✓ Loaded {len(images)} pages")
+                pdf_bytes = pdf_file.getvalue()
+                # Pages are rasterized only when first needed; cached by
+                # content, so reruns and other sessions share the renders
+                pages = upload_cache.get_or_compute(
+                    ContentCache.key("pdf_pages", pdf_bytes,
+                                     dpi=PDFConfig.DPI, version=PDFProcessor.VERSION),
+                    lambda: LazyPageSource(pdf_bytes, dpi=PDFConfig.DPI)
+                )
+                st.session_state.pdf_pages = pages
+                st.session_state.pdf_bytes = pdf_bytes
+                width, height = pages.page_size(0)
+                st.success(f"✓ Loaded {len(pages)} pages ({width}×{height} px at {PDFConfig.DPI} DPI)")
             except Exception as e:
                 st.error(f"Error: {str(e)}")
     
@@ -155,10 +91,12 @@ def render_upload_section():
         
         if data_file:
             try:
-                df_loaded = SpreadsheetProcessor.load_file(data_file)
+                df_loaded, df_processed = upload_cache.get_or_compute(
+                    ContentCache.key("spreadsheet", data_file.getvalue(), name=data_file.name,
+                                     version=SpreadsheetProcessor.VERSION),
+                    lambda: load_spreadsheet(data_file)
+                )
                 st.session_state.loaded_data = df_loaded
-
-                df_processed = SpreadsheetProcessor.process_file(df_loaded)
                 st.session_state.processed_data = df_processed
                 
                 st.success(f"✓ Loaded {len(df_processed)} rows")
@@ -174,7 +112,11 @@ def render_upload_section():
         
         if template_file:
             try:
-                template = TemplateLoader.from_csv(template_file)
+                template = upload_cache.get_or_compute(
+                    ContentCache.key("template", template_file.getvalue(),
+                                     version=TemplateLoader.VERSION),
+                    lambda: TemplateLoader.from_csv(template_file)
+                )
                 st.session_state.template = template
                 st.success(f"✓ Loaded {len(template.fields)} fields")
                 
@@ -185,6 +127,23 @@ def render_upload_section():
                 st.error(f"Error: {str(e)}")
 
 
+def load_spreadsheet(data_file):
+    """Load and process a spreadsheet; returns (loaded, processed) frames"""
+    # Read and processed in chunks, so intermediate columns of the whole
+    # sheet are never held at once
+    chunks = list(SpreadsheetProcessor.process_chunks(SpreadsheetProcessor.read_chunks(data_file)))
+    if not chunks:
+        raise ValueError("No data rows in spreadsheet")
+    df_loaded = pd.concat([loaded for loaded, _ in chunks])
+    df_processed = pd.concat([processed for _, processed in chunks])
+    return df_loaded, df_processed
+
+
+def metrics_scope(registry):
+    """Record timings into `registry`; a no-op when metrics are off"""
+    return registry.activate() if registry is not None else nullcontext()
+
+
 def render_mapping_section():
     """Render mapping section"""
     template = st.session_state.get('template')
@@ -203,7 +162,7 @@ def render_mapping_section():
         # Update widget states to reflect auto-mapping
         for col, field in auto_map.items():
             st.session_state[f"sel_{col}"] = field
-            
+        
         st.success(f"Auto-mapped {len(auto_map)} fields")
     
     st.divider()
@@ -254,16 +213,22 @@ def render_mapping_section():
     
     if new_mapping:
         st.info(f"**{len(new_mapping)}** columns mapped")
+        st.download_button(
+            "💾 Save Mapping (for the command line)",
+            json.dumps(new_mapping, indent=2),
+            "mapping.json",
+            "application/json"
+        )
 
 
 def render_generation_section():
     """Render generation section"""
     template = st.session_state.get('template')
-    images = st.session_state.get('pdf_images')
+    pages = st.session_state.get('pdf_pages')
     df = st.session_state.get('processed_data')
     mapping = st.session_state.get('column_field_mapping')
     
-    if not all([template, images, df is not None, mapping]):
+    if not all([template, pages, df is not None, mapping]):
         return
     
     st.header("Step 3: Generate PDFs")
@@ -274,60 +239,261 @@ def render_generation_section():
     with col2:
         st.metric("Fields", len(mapping))
     with col3:
-        st.metric("Pages", len(images))
+        st.metric("Pages", len(pages))
     
+    # Form mode is only offered for PDFs with form fields
+    widget_names = upload_cache.get_or_compute(
+        ContentCache.key("pdf_widgets", st.session_state.pdf_bytes),
+        lambda: PDFProcessor.widget_names(st.session_state.pdf_bytes)
+    )
+    modes = [m for m in PDFConfig.RENDER_MODES if m != "form" or widget_names]
+    mode = st.radio(
+        "Output mode",
+        options=modes,
+        index=modes.index(PDFConfig.RENDER_MODE) if PDFConfig.RENDER_MODE in modes else 0,
+        format_func=lambda m: {
+            "vector": "Vector overlay (original pages, small files)",
+            "raster": "Raster background (rendered page images)",
+            "form": "Fill form fields (template widget_name)"
+        }[m],
+        horizontal=True
+    )
+    
+    background_options = {}
+    if mode == "form":
+        linked = [f for f in template.fields if f.widget_name in widget_names]
+        st.caption(f"The PDF has {len(widget_names)} form fields; "
+                   f"{len(linked)} template fields are filled through them")
+        background_options['flatten'] = st.checkbox(
+            "Flatten form fields",
+            value=PDFConfig.FLATTEN_WIDGETS,
+            help="Filled fields become plain page content and can no longer be edited"
+        )
+    elif mode == "raster":
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            background_options['image_format'] = st.selectbox(
+                "Background format",
+                options=PDFConfig.BACKGROUND_FORMATS,
+                index=PDFConfig.BACKGROUND_FORMATS.index(PDFConfig.BACKGROUND_FORMAT)
+            )
+        with col2:
+            background_options['quality'] = st.slider(
+                "JPEG quality", 10, 95, PDFConfig.BACKGROUND_QUALITY,
+                disabled=background_options['image_format'] != "JPEG"
+            )
+        with col3:
+            background_options['dpi'] = st.select_slider(
+                "Background DPI",
+                options=sorted({72, 100, 150, PDFConfig.BACKGROUND_DPI, PDFConfig.DPI}),
+                value=PDFConfig.BACKGROUND_DPI
+            )
+        include_empty = st.checkbox(
+            "Rasterize pages without fields",
+            value=PDFConfig.INCLUDE_EMPTY_PAGES,
+            help="Pages with no template fields are copied from the PDF as they are unless rasterized too"
+        )
+        if not include_empty:
+            background_options['page_numbers'] = sorted(template.get_page_numbers())
+            background_options['source_pdf'] = st.session_state.pdf_bytes
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        output = st.radio(
+            "Output file",
+            options=ExportConfig.OUTPUT_FORMATS,
+            format_func=lambda o: {
+                "zip": "ZIP with one PDF per row",
+                "merged": "Single merged PDF"
+            }[o],
+            horizontal=True
+        )
+    with col2:
+        bookmarks = st.checkbox(
+            "Bookmark each form",
+            value=ExportConfig.MERGED_BOOKMARKS,
+            disabled=output != "merged",
+            help=f"Outline entries named after column {ExportConfig.PDF_FILENAME_COL}"
+        )
+    
+    # Generation runs as a background job, so a refresh does not stop it
     if st.button("🚀 Generate All PDFs", type="primary", use_container_width=True):
-        generate_pdfs(template, images, df, mapping)
+        st.session_state.job_id = submit_job(template, pages, df, mapping, mode,
+                                             background_options, output, bookmarks)
+    
+    render_jobs_section()
 
 
-def generate_pdfs(template, images, df, mapping):
-    """Generate all PDFs"""
-    with st.spinner("Generating PDFs..."):
-        progress = st.progress(0)
-        pdf_files = []
-        filenames = []
-        loaded_data = st.session_state.get('loaded_data')
-        
-        for idx, row in df.iterrows():
-            field_data = {}
-            for col, field_name in mapping.items():
-                if pd.notna(row[col]):
-                    field_data[field_name] = row[col]
-            
-            pdf = PDFGenerator.create_filled_pdf(images, template, field_data)
-            
-            name = loaded_data[ExportConfig.PDF_FILENAME_COL].iloc[idx]
-            # Replace special characters & replace white spaces with underscores
-            name = "".join(c for c in str(name) if c.isalnum() or c in (' ', '_')).rstrip()
-            name = name.replace(" ", "_")
-            filename = f"{str(name)}.pdf"
-            
-            pdf_files.append(pdf)
-            filenames.append(filename)
-            progress.progress((idx + 1) / len(df))
-        
-        st.success(f"✅ Generated {len(pdf_files)} PDFs!")
+def submit_job(template, pages, df, mapping, mode=PDFConfig.RENDER_MODE,
+               background_options=None, output="zip", bookmarks=ExportConfig.MERGED_BOOKMARKS):
+    """Prepare the batch and start it as a background job; returns the job id"""
+    registry = None
+    if MetricsConfig.ENABLED:
+        registry = MetricsRegistry()
+        registry.merge(st.session_state.upload_metrics.export_state())
+    
+    with st.spinner("Preparing page backgrounds..."), metrics_scope(registry):
+        # Page backgrounds are encoded once and shared by every row
+        if mode == "vector":
+            background = BackgroundCache.from_pdf(st.session_state.pdf_bytes,
+                                                  wrap_pages=template.get_page_numbers())
+        elif mode == "form":
+            background = BackgroundCache.from_form(st.session_state.pdf_bytes,
+                                                   **(background_options or {}))
+        else:
+            background = BackgroundCache.from_images(pages, **(background_options or {}))
+    
+    names = st.session_state.loaded_data[ExportConfig.PDF_FILENAME_COL].astype(str).tolist()
+    inputs = JobInputs(background, template, mapping, df, names, output, bookmarks)
+    return job_runner.submit(inputs, registry.export_state() if registry is not None else None)
+
+
+def render_jobs_section():
+    """Pick a job (also after a browser refresh) and follow its progress"""
+    jobs = job_runner.jobs()
+    if not jobs:
+        return
+    
+    st.subheader("Jobs")
+    jobs_by_id = {job.job_id: job for job in jobs}
+    if st.session_state.get('job_id') not in jobs_by_id:
+        st.session_state.job_id = jobs[0].job_id
+    
+    job_id = st.selectbox(
+        "Job",
+        options=list(jobs_by_id),
+        key='job_id',
+        format_func=lambda i: (f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(jobs_by_id[i].created))}"
+                               f" · {jobs_by_id[i].total:,} rows · {jobs_by_id[i].output}"
+                               f" · {jobs_by_id[i].status}")
+    )
+    
+    # Only a running job's panel refreshes itself, every JOB_POLL_SECONDS
+    polling = jobs_by_id[job_id].status in ACTIVE_STATUSES
+    st.fragment(run_every=GenerationConfig.JOB_POLL_SECONDS if polling else None)(
+        render_job_status)(job_id, polling)
+
+
+def render_job_status(job_id, polling):
+    """Progress, cancel/resume controls and downloads for one job"""
+    job = job_runner.get(job_id)
+    
+    if job.status in ACTIVE_STATUSES:
+        st.progress(job.progress, text=f"{job.status.capitalize()}: {job.completed:,} of {job.total:,} rows")
+        if st.button("⏹️ Cancel", key=f"cancel_{job_id}"):
+            job_runner.cancel(job_id)
+        return
+    
+    if polling:
+        # Finished since the last full run: redraw without polling
+        st.rerun()
+    
+    if job.status == "completed":
+        st.success(f"✅ Generated {job.total} PDFs!")
+    elif job.status == "failed":
+        st.error(f"Stopped after {job.completed:,} of {job.total:,} rows: {job.error}")
+    else:
+        st.warning(f"{job.status.capitalize()} after {job.completed:,} of {job.total:,} rows")
+    st.caption(f"Rendered {job.rendered} rows, reused {job.reused} unchanged from earlier runs")
+    
+    if job.resumable:
+        if st.button("▶️ Resume", key=f"resume_{job_id}", help="Continue from the last saved row"):
+            job_runner.resume(job_id)
+            st.rerun()
+    
+    if job.checkpoint.get("rows") or job.status == "completed":
+        render_job_downloads(job)
+    
+    registry = job_runner.metrics(job_id)
+    if registry is not None:
+        render_metrics_panel(registry)
+
+
+def render_job_downloads(job):
+    """Download buttons for a job's output (partial if it stopped early)"""
+    partial = "" if job.status == "completed" else " (partial)"
+    
+    # Only read from disk when a button is clicked, not on every rerun
+    def read_output():
+        with job_runner.store.open_output(job) as f:
+            return f.read()
+    
+    if job.output == "merged":
+        st.download_button(
+            f"📄 Download Merged PDF{partial}",
+            read_output,
+            ExportConfig.MERGED_FILENAME,
+            "application/pdf",
+            use_container_width=True
+        )
+        return
+    
+    try:
+        # Only the archive's central directory is read here
+        with job_runner.store.open_output(job) as f, zipfile.ZipFile(f) as archive:
+            first = archive.namelist()[0]
+    except (OSError, KeyError, IndexError, zipfile.BadZipFile):
+        st.warning("The saved output cannot be read; resume the job to finish it.")
+        return
+    
+    def read_first():
+        with job_runner.store.open_output(job) as f, zipfile.ZipFile(f) as archive:
+            return archive.read(first)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.download_button(
+            f"📦 Download All as ZIP{partial}",
+            read_output,
+            ExportConfig.ZIP_FILENAME,
+            "application/zip",
+            use_container_width=True
+        )
+    
+    with col2:
+        st.download_button(
+            "📄 Download First PDF",
+            read_first,
+            first,
+            "application/pdf",
+            use_container_width=True
+        )
+    
+    if job.archive:
+        st.caption(f"ZIP: {ArchiveStats(**job.archive).summary()}")
+
+
+def render_metrics_panel(registry):
+    """Per-stage timings of the last batch, with exports for dashboards"""
+    summary = registry.to_dict()
+    
+    with st.expander("⏱️ Stage timings"):
+        timings = pd.DataFrame([
+            {
+                "Stage": name,
+                "Calls": stats["count"],
+                "Total (s)": round(stats["total_seconds"], 3),
+                "Mean (ms)": round(stats["mean_seconds"] * 1000, 2),
+                "p50 (ms)": round(stats["p50_seconds"] * 1000, 2),
+                "p90 (ms)": round(stats["p90_seconds"] * 1000, 2),
+                "p99 (ms)": round(stats["p99_seconds"] * 1000, 2),
+                "Max (ms)": round(stats["max_seconds"] * 1000, 2),
+            }
+            for name, stats in summary["timers"].items()
+        ])
+        st.dataframe(timings, hide_index=True, use_container_width=True)
+        st.caption("Stages overlap: rows are rendered while the ZIP is written, "
+                   "and `batch` covers the whole run. "
+                   + ", ".join(f"{name}: {value:,}" for name, value in summary["counters"].items()))
         
         col1, col2 = st.columns(2)
-        
         with col1:
-            zip_file = FileUtils.create_zip(pdf_files, filenames)
-            st.download_button(
-                "📦 Download All as ZIP",
-                zip_file,
-                ExportConfig.ZIP_FILENAME,
-                "application/zip",
-                use_container_width=True
-            )
-        
+            st.download_button("Export JSON", registry.to_json(), "metrics.json",
+                               "application/json", use_container_width=True)
         with col2:
-            st.download_button(
-                "📄 Download First PDF",
-                pdf_files[0],
-                filenames[0],
-                "application/pdf",
-                use_container_width=True
-            )
+            st.download_button("Export Prometheus", registry.to_prometheus(), "metrics.prom",
+                               "text/plain", use_container_width=True)
 
 
 # ============================================================================
@@ -345,7 +511,8 @@ def main():
     init_session_state()
     
     render_header()
-    render_upload_section()
+    with metrics_scope(st.session_state.upload_metrics):
+        render_upload_section()
     
     st.divider()
     render_mapping_section()
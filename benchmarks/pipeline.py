@@ -0,0 +1,183 @@
+"""
+End-to-end pipeline benchmark on synthetic LE1 data
+
+Times each stage separately (spreadsheet load, process_file for all columns
+and for the mapped ones only, template parse and cached load, pdf_to_images,
+background, per-row create_filled_pdf, ZIP) for each row count, and records
+rows/sec, peak RSS and output bytes. Each row count runs in its own process so
+peak RSS is not carried over between sizes.
+Runs offline with the bundled sample PDF and template only.
+
+Usage:
+    python benchmarks/pipeline.py --rows 100 1000 --save benchmarks/baseline.json
+    python benchmarks/pipeline.py --rows 100 1000 --compare benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+DEFAULT_ROWS = [100, 1000, 10000, 100000]
+PDF_FILE = "form_LE1_page_1-4.pdf"
+TEMPLATE_FILE = "coordinate_template.csv"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_size(rows: int, render_rows: int, seed: int, file_format: str) -> dict:
+    """Run every stage once for `rows` rows; returns the stage results"""
+    from config.settings import SAMPLES_DIR, TEMPLATES_DIR, PDFConfig
+    from src.core.background_cache import BackgroundCache
+    from src.core.pdf_generator import PDFGenerator
+    from src.core.pdf_processor import PDFProcessor
+    from src.io.spreadsheet_processor import SpreadsheetProcessor
+    from src.io.template_loader import TemplateLoader
+    from src.utils.file_utils import FileUtils
+    from synthetic_le1 import write_le1_file
+    
+    data_path = write_le1_file(rows, seed, file_format)
+    pdf_bytes = (SAMPLES_DIR / PDF_FILE).read_bytes()
+    stages = {}
+    
+    def timed(name, func, count, output_bytes=None):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        stages[name] = {
+            "seconds": seconds,
+            "rows_per_sec": count / seconds if count and seconds else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        if output_bytes:
+            stages[name]["output_bytes"] = output_bytes(result)
+        return result
+    
+    with open(data_path, 'rb') as data_file:
+        loaded = timed("load", lambda: SpreadsheetProcessor.load_file(data_file), rows)
+    df = timed("process_file", lambda: SpreadsheetProcessor.process_file(loaded), rows)
+    # Once-per-batch stages have no per-row rate
+    template_path = TEMPLATES_DIR / TEMPLATE_FILE
+    template = timed("template", lambda: TemplateLoader.from_csv(template_path, cache=False), None)
+    # Loaded once more to fill the on-disk cache, then timed from it
+    TemplateLoader.from_csv(template_path, cache=True)
+    timed("template_cached", lambda: TemplateLoader.from_csv(template_path, cache=True), None)
+    timed("pdf_to_images", lambda: PDFProcessor(dpi=PDFConfig.DPI).pdf_to_images(pdf_bytes), None)
+    background = timed(
+        "background",
+        lambda: BackgroundCache.from_pdf(pdf_bytes, wrap_pages=template.get_page_numbers()), None
+    )
+    
+    # Rendering is timed on a sample of rows; rows/sec scales to the batch
+    mapping = {col: col for col in df.columns if col in template.get_field_names()}
+    plan = template.compile_plan(background.geometry, mapping)
+    timed("process_mapped",
+          lambda: SpreadsheetProcessor.process_file(loaded, columns=list(mapping)), rows)
+    sample = list(PDFGenerator.format_rows(plan, df.head(render_rows)))
+    pdfs = timed(
+        "create_filled_pdf",
+        lambda: [PDFGenerator.create_filled_pdf(background, plan, row) for row in sample],
+        len(sample), lambda result: sum(pdf.getbuffer().nbytes for pdf in result)
+    )
+    names = [f"form_{i}.pdf" for i in range(len(pdfs))]
+    timed("create_zip", lambda: FileUtils.create_zip(pdfs, names), len(pdfs),
+          lambda result: len(result.getvalue()))
+    
+    return {"rows": rows, "rendered_rows": len(sample), "data_file": data_path.name,
+            "stages": stages, "peak_rss_mb": peak_rss_mb()}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print per-stage time ratios against a baseline; False if any regressed"""
+    ok = True
+    print(f"\nCompared with {baseline['meta']['created']} (regression above {tolerance:.2f}x)")
+    for rows, result in results.items():
+        base = baseline["results"].get(rows)
+        if not base:
+            print(f"  {rows} rows: not in baseline")
+            continue
+        for stage, current in result["stages"].items():
+            previous = base["stages"].get(stage)
+            if not previous or not previous["seconds"]:
+                continue
+            ratio = current["seconds"] / previous["seconds"]
+            flag = "REGRESSION" if ratio > tolerance else ""
+            ok = ok and not flag
+            print(f"  {rows:>7} rows  {stage:<18} {previous['seconds']:9.3f}s -> "
+                  f"{current['seconds']:9.3f}s  {ratio:5.2f}x {flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--render-rows", type=int, default=200,
+                        help="Rows rendered to PDF per size (rendering dominates; default 200)")
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", help="Compare against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="Slowdown ratio reported as a regression")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(run_size(args.child, args.render_rows, args.seed, args.format)))
+        return 0
+    
+    results = {}
+    for rows in args.rows:
+        child = subprocess.run(
+            [sys.executable, __file__, "--child", str(rows), "--render-rows", str(args.render_rows),
+             "--format", args.format, "--seed", str(args.seed)],
+            capture_output=True, text=True
+        )
+        if child.returncode != 0:
+            print(f"{rows} rows failed:\n{child.stderr}", file=sys.stderr)
+            return 1
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        results[str(rows)] = result
+        
+        print(f"{rows} rows ({result['rendered_rows']} rendered), peak RSS {result['peak_rss_mb']:.0f} MB")
+        for stage, stats in result["stages"].items():
+            rate = f"{stats['rows_per_sec']:10.1f} rows/s" if stats["rows_per_sec"] else ""
+            size = f"  {stats['output_bytes'] / 1024 / 1024:8.1f} MB out" if "output_bytes" in stats else ""
+            print(f"  {stage:<18} {stats['seconds']:9.3f}s {rate}{size}")
+    
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "render_rows": args.render_rows,
+            "format": args.format,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    
+    ok = True
+    if args.compare:
+        with open(args.compare) as f:
+            ok = compare(results, json.load(f), args.tolerance)
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, indent=2))
+        print(f"\nSaved {args.save}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Pixmap to image conversion micro-benchmark
+
+Compares the old PPM round trip with the direct sample-buffer conversion
+in PDFProcessor, per page of each sample PDF. Each method runs in its own
+process so peak memory (max RSS) is measured independently.
+
+Usage:
+    python benchmarks/pixmap_conversion.py [--dpi 200] [--repeat 3]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+METHODS = ["ppm", "frombuffer", "numpy"]
+
+
+def convert_ppm(processor, pdf_document, page_num):
+    """Previous implementation: encode a PPM, then decode it"""
+    import fitz
+    from PIL import Image
+    mat = fitz.Matrix(processor.zoom, processor.zoom)
+    pix = pdf_document[page_num].get_pixmap(matrix=mat)
+    return Image.frombytes("RGB", [pix.width, pix.height], pix.tobytes("ppm"))
+
+
+def run_method(method: str, pdf_path: str, dpi: int, repeat: int) -> dict:
+    """Convert every page `repeat` times, keeping the last round alive"""
+    import fitz
+    from src.core.pdf_processor import PDFProcessor
+    
+    processor = PDFProcessor(dpi=dpi)
+    convert = {
+        "ppm": lambda doc, n: convert_ppm(processor, doc, n),
+        "frombuffer": processor.render_page,
+        "numpy": processor.render_page_array,
+    }[method]
+    
+    pdf_document = fitz.open(pdf_path)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    
+    for _ in range(repeat):
+        pages = []
+        for page_num in range(pdf_document.page_count):
+            start = time.perf_counter()
+            pages.append(convert(pdf_document, page_num))
+            timings.append(time.perf_counter() - start)
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "method": method,
+        "pages": pdf_document.page_count,
+        "seconds_per_page": sum(timings) / len(timings),
+        # ru_maxrss is in KB on Linux
+        "peak_mb_per_page": (peak - baseline) / 1024 / pdf_document.page_count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--method", choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.method:
+        # Child process: one method, one PDF
+        print(json.dumps(run_method(args.method, args.pdf, args.dpi, args.repeat)))
+        return
+    
+    for pdf_path in sorted((ROOT / "data" / "samples").glob("*.pdf")):
+        print(f"{pdf_path.name} at {args.dpi} DPI")
+        for method in METHODS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--method", method, "--pdf", str(pdf_path),
+                 "--dpi", str(args.dpi), "--repeat", str(args.repeat)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"  {method:<11} {result['seconds_per_page'] * 1000:7.1f} ms/page  "
+                  f"{result['peak_mb_per_page']:6.1f} MB peak/page")
+
+
+if __name__ == "__main__":
+    main()
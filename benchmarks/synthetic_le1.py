@@ -0,0 +1,103 @@
+"""
+Synthetic LE1 spreadsheets
+
+Builds data with the columns `SpreadsheetProcessor.process_file` expects by
+tiling the bundled sample row and varying the fields that drive the
+expensive processing: names, addresses, TINs, dates and exchange rates.
+Generation is seeded, so a (rows, seed) pair always gives the same data.
+"""
+
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config.settings import SAMPLES_DIR, OUTPUT_DIR
+
+SAMPLE_FILE = SAMPLES_DIR / "sample_data_form_le1.xlsx"
+DATA_DIR = OUTPUT_DIR / "benchmarks"
+
+NAME_WORDS = ["ASIA", "PACIFIC", "GAS", "TERMINAL", "MARINE", "CAPITAL", "HOLDINGS",
+              "OFFSHORE", "TRADING", "VENTURES", "LABUAN", "GLOBAL", "ENERGY",
+              "SHIPPING", "INVESTMENTS", "RESOURCES", "INTERNATIONAL", "TANKERS"]
+NAME_SUFFIXES = ["(L) PTE. LTD.", "(L) LTD.", "(L) INC.", "(L) BHD."]
+STREET_WORDS = ["MERDEKA", "AMPANG", "SULTAN ISMAIL", "TUN RAZAK", "BUNGA RAYA",
+                "PERDANA", "INDAH", "SS2/24", "KEBUN TEH", "BANDAR BARU"]
+BUILDINGS = ["MAIN OFFICE TOWER FINANCIAL PARK LABUAN", "MENARA ABC", "WISMA KEWANGAN",
+             "PLAZA PERMATA", "KOMPLEKS PERNIAGAAN", ""]
+# (postcode prefix, city, state as written on the form)
+LOCALITIES = [
+    ("87", "LABUAN", "FEDERAL TERRITORY OF LABUAN"),
+    ("87", "LABUAN", "WILAYAH PERSEKUTUAN LABUAN"),
+    ("50", "KUALA LUMPUR", "WILAYAH PERSEKUTUAN KUALA LUMPUR"),
+    ("62", "PUTRAJAYA", "WILAYAH PERSEKUTUAN PUTRAJAYA"),
+    ("47", "PETALING JAYA", "SELANGOR"),
+    ("81", "JOHOR BAHRU", "JOHOR"),
+    ("88", "KOTA KINABALU", "SABAH"),
+    ("93", "KUCHING", "SARAWAK"),
+    ("10", "GEORGETOWN", "PULAU PINANG"),
+    ("30", "IPOH", "PERAK"),
+]
+
+
+def _pick(rng, options, rows):
+    return np.asarray(options, dtype=object)[rng.integers(0, len(options), rows)]
+
+
+def _addresses(rng, rows):
+    """'<unit>, <building> JALAN <street> <postcode> <city> <state>' strings"""
+    units = pd.Series(rng.integers(1, 400, rows)).astype(str)
+    localities = rng.integers(0, len(LOCALITIES), rows)
+    prefixes, cities, states = (np.asarray([loc[i] for loc in LOCALITIES], dtype=object)[localities]
+                                for i in range(3))
+    postcodes = pd.Series(prefixes) + pd.Series(rng.integers(0, 1000, rows)).astype(str).str.zfill(3)
+    return ("UNIT " + units + ", " + pd.Series(_pick(rng, BUILDINGS, rows))
+            + " JALAN " + pd.Series(_pick(rng, STREET_WORDS, rows))
+            + " " + postcodes + " " + pd.Series(cities) + " " + pd.Series(states)).str.replace("  ", " ")
+
+
+def make_le1_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic raw LE1 data: the sample's columns, `rows` varied rows"""
+    rng = np.random.default_rng(seed)
+    sample = pd.read_excel(SAMPLE_FILE)
+    df = sample.iloc[np.zeros(rows, dtype=int)].reset_index(drop=True)
+    
+    words = [pd.Series(_pick(rng, NAME_WORDS, rows)) for _ in range(3)]
+    df["A1"] = words[0] + " " + words[1] + " " + words[2] + " " + pd.Series(_pick(rng, NAME_SUFFIXES, rows))
+    df["A2"] = _addresses(rng, rows)
+    df["C1"] = _addresses(rng, rows)
+    df["A3"] = "LE " + pd.Series(rng.integers(10**10, 10**11, rows)).astype(str)
+    df["A4"] = rng.integers(10**10, 10**11, rows)
+    df["A6"] = rng.integers(10**9, 10**10, rows)
+    
+    # Commencement dates in the mixed forms operators type
+    days = pd.Timestamp("1990-01-01") + pd.to_timedelta(rng.integers(0, 12000, rows), unit="D")
+    formats = _pick(rng, ["%d/%m/%Y", "%d/%m/%Y\xa0", "%Y-%m-%d"], rows)
+    df["A7 (Commencement Date / Incorporation Date)"] = [d.strftime(f) for d, f in zip(days, formats)]
+    
+    years = pd.Series(rng.integers(2019, 2026, rows)).astype(str)
+    period = "01-01-" + years + " hingga 31-12-" + years
+    df["A10"] = period
+    df["A11"] = period
+    
+    rates = pd.Series(np.round(rng.uniform(0.2, 5.0, rows), 4))
+    df["A14"] = rates.mask(rng.random(rows) < 0.1)
+    return df
+
+
+def write_le1_file(rows: int, seed: int = 0, file_format: str = "xlsx") -> Path:
+    """Write (or reuse) a synthetic spreadsheet under OUTPUT_DIR/benchmarks"""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    path = DATA_DIR / f"le1_{rows}_{seed}.{file_format}"
+    if not path.exists():
+        df = make_le1_frame(rows, seed)
+        tmp_path = path.with_suffix(".tmp" + path.suffix)
+        if file_format == "csv":
+            df.to_csv(tmp_path, index=False)
+        else:
+            df.to_excel(tmp_path, index=False)
+        tmp_path.replace(path)
+    return path
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+PDF Form Filler Command Line
+Batch-fill PDF forms without the Streamlit UI
+
+Example:
+    python cli.py --template data/templates/coordinate_template.csv \
+                  --pdf form.pdf --data data.xlsx --mapping mapping.json \
+                  --output filled_forms.zip
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Batch-fill a PDF form from a spreadsheet using a CSV template."
+    )
+    parser.add_argument("--template", required=True, help="Template CSV with field coordinates")
+    parser.add_argument("--pdf", required=True, help="Blank PDF form")
+    parser.add_argument("--data", required=True, help="Data spreadsheet (.xlsx, .xls or .csv)")
+    parser.add_argument("--mapping",
+                        help="Column-to-field mapping (.json or .csv); "
+                             "default maps columns to fields of the same name")
+    parser.add_argument("--output", required=True,
+                        help="Output .zip file, a .pdf file to merge all rows into one document, "
+                             "or a directory to write one PDF per row")
+    parser.add_argument("--mode", choices=["vector", "raster", "form"], default=None,
+                        help="Output mode (default from PDFConfig.RENDER_MODE); "
+                             "'form' fills the PDF's own form fields by widget_name")
+    parser.add_argument("--flatten", action="store_true",
+                        help="Form mode: turn filled form fields into plain page content")
+    parser.add_argument("--include-empty-pages", action="store_true",
+                        help="Raster mode: also rasterize pages that have no fields "
+                             "(by default they are copied from the PDF as they are)")
+    parser.add_argument("--no-bookmarks", action="store_true",
+                        help="Merged .pdf output: leave out the per-row bookmarks")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Render every row, ignoring PDFs cached by earlier runs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default from GenerationConfig.MAX_WORKERS)")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help="Spreadsheet rows read and processed at a time "
+                             "(default from SpreadsheetConfig.CHUNK_ROWS)")
+    parser.add_argument("--metrics",
+                        help="Write per-stage timings to this file "
+                             "(Prometheus text if it ends in .prom, JSON otherwise)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run one batch"""
+    args = parse_args(argv)
+    
+    from src.utils.metrics import MetricsRegistry
+    
+    registry = MetricsRegistry() if args.metrics else None
+    with registry.activate() if registry is not None else nullcontext():
+        run_batch(args)
+    
+    if registry is not None:
+        path = Path(args.metrics)
+        path.write_text(registry.to_prometheus() if path.suffix == ".prom" else registry.to_json())
+        print(f"  Timings written to {path}")
+    return 0
+
+
+def run_batch(args: argparse.Namespace):
+    """Load inputs, render every row and write the output"""
+    # Imported after argument parsing so --help and usage errors stay instant
+    from config.settings import PDFConfig, GenerationConfig, ExportConfig, SpreadsheetConfig
+    from src.core.background_cache import BackgroundCache
+    from src.core.batch_generator import BatchGenerator
+    from src.core.render_cache import RenderCache
+    from src.core.merged_writer import MergedPDFWriter
+    from src.core.page_source import LazyPageSource
+    from src.core.pdf_processor import PDFProcessor
+    from src.io.spreadsheet_processor import SpreadsheetProcessor
+    from src.io.template_loader import TemplateLoader
+    from src.utils.file_utils import FileUtils
+    
+    mode = args.mode or PDFConfig.RENDER_MODE
+    workers = args.workers or GenerationConfig.MAX_WORKERS
+    chunk_rows = args.chunk_rows or SpreadsheetConfig.CHUNK_ROWS
+    timings = {}
+    
+    pdf_bytes = Path(args.pdf).read_bytes()
+    # Checked before the data is read, which can take a while
+    if mode == "form" and not PDFProcessor.has_widgets(pdf_bytes):
+        raise ValueError(f"{args.pdf} has no form fields; use --mode vector or raster")
+    
+    start = time.perf_counter()
+    template = TemplateLoader.from_csv(args.template)
+    
+    if args.mapping:
+        mapping = TemplateLoader.load_mapping(args.mapping)
+    else:
+        field_names = template.get_field_names()
+        mapping = {col: col for col in SpreadsheetProcessor.OUTPUT_COLUMNS if col in field_names}
+    
+    unknown = [col for col in mapping if col not in SpreadsheetProcessor.OUTPUT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Mapping refers to unknown columns: {', '.join(unknown)}")
+    
+    # The data file is streamed: rendering starts on the first chunk while
+    # the rest is still being read. Only mapped columns are derived.
+    data_file = open(args.data, 'rb')
+    chunks = SpreadsheetProcessor.process_chunks(
+        SpreadsheetProcessor.read_chunks(data_file, chunk_rows), columns=list(mapping))
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        data_file.close()
+        raise ValueError(f"No data rows in {args.data}")
+    timings['load'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    if mode == "vector":
+        background = BackgroundCache.from_pdf(pdf_bytes, wrap_pages=template.get_page_numbers())
+    elif mode == "form":
+        background = BackgroundCache.from_form(pdf_bytes,
+                                               flatten=args.flatten or PDFConfig.FLATTEN_WIDGETS)
+    else:
+        pages = LazyPageSource(pdf_bytes, dpi=PDFConfig.DPI)
+        include_empty = args.include_empty_pages or PDFConfig.INCLUDE_EMPTY_PAGES
+        page_numbers = None if include_empty else sorted(template.get_page_numbers())
+        background = BackgroundCache.from_images(pages, page_numbers, source_pdf=pdf_bytes)
+    timings['background'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    use_cache = GenerationConfig.RENDER_CACHE and not args.no_cache
+    generator = BatchGenerator(background, template, mapping, workers=workers,
+                               cache=RenderCache() if use_cache else None)
+    names = []
+    
+    def data_rows():
+        """Planned rows of every chunk; file names are collected alongside"""
+        for loaded, processed in itertools.chain([first_chunk], chunks):
+            names.extend(loaded[ExportConfig.PDF_FILENAME_COL].astype(str))
+            yield from generator.data_rows(processed)
+    
+    def named_pdfs():
+        for idx, pdf in enumerate(generator.generate(data_rows())):
+            yield FileUtils.safe_filename(names[idx]), pdf
+    
+    output = Path(args.output)
+    output_bytes = 0
+    zip_stats = None
+    
+    try:
+        if output.suffix.lower() == ".pdf":
+            # One document; rows are rendered here, in order, as pages are appended
+            output.parent.mkdir(parents=True, exist_ok=True)
+            bookmarks = ExportConfig.MERGED_BOOKMARKS and not args.no_bookmarks
+            with MergedPDFWriter(output, background, generator.plan, bookmarks=bookmarks) as writer:
+                for idx, row in enumerate(data_rows()):
+                    writer.add(row, names[idx])
+            generator.rendered = writer.rows
+            output_bytes = output.stat().st_size
+        elif output.suffix.lower() == ".zip":
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with open(output, 'wb') as zip_file:
+                zip_stats = FileUtils.write_zip(zip_file, named_pdfs())
+            output_bytes = output.stat().st_size
+        else:
+            output.mkdir(parents=True, exist_ok=True)
+            for filename, pdf in named_pdfs():
+                (output / filename).write_bytes(pdf)
+                output_bytes += len(pdf)
+    finally:
+        data_file.close()
+    timings['generate'] = time.perf_counter() - start
+    
+    rows = len(names)
+    total = sum(timings.values())
+    print(f"Generated {rows} PDFs ({mode}, {workers} workers) -> {output}")
+    print("  " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+    print(f"  {generator.rendered} rendered, {generator.reused} reused from earlier runs")
+    print(f"  {rows / timings['generate']:.1f} rows/s rendering, "
+          f"{rows / total:.1f} rows/s overall, {output_bytes / 1024 / 1024:.1f} MB written")
+    if zip_stats:
+        print(f"  ZIP: {zip_stats.summary()}")
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (ValueError, ImportError, OSError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
@@ -2,6 +2,7 @@
 Application Configuration Settings
 """
 
+import os
 from pathlib import Path
 
 # Base paths
@@ -27,6 +28,65 @@ class PDFConfig:
     """PDF processing configuration"""
     DPI = 200
     DEFAULT_ZOOM = DPI / 72
+    # "vector" stamps text onto the original PDF pages,
+    # "raster" redraws every page from its rendered image,
+    # "form" fills the PDF's own form fields (widgets) by name
+    RENDER_MODES = ["vector", "raster", "form"]
+    RENDER_MODE = "vector"
+    # Form mode: turn filled fields into plain page content
+    FLATTEN_WIDGETS = False
+    # Raster mode: page size (points) and how backgrounds are encoded
+    RASTER_PAGE_SIZE = (612, 792)  # US Letter
+    BACKGROUND_FORMATS = ["JPEG", "PNG"]
+    BACKGROUND_FORMAT = "JPEG"
+    BACKGROUND_QUALITY = 85
+    BACKGROUND_DPI = DPI
+    # Rendered page images kept per uploaded PDF
+    PAGE_CACHE_BYTES = 256 * 1024 * 1024
+    # Raster output only rasterizes pages that have fields unless asked to;
+    # the others are copied from the original PDF as vector pages
+    INCLUDE_EMPTY_PAGES = False
+
+
+class GenerationConfig:
+    """Batch generation configuration"""
+    # Worker processes; 1 renders in the calling process
+    MAX_WORKERS = os.cpu_count() or 1
+    # Rows sent to a worker per task
+    CHUNK_SIZE = 25
+    # Chunks queued or running per worker; bounds memory held by results
+    MAX_IN_FLIGHT_PER_WORKER = 2
+    # "spawn" is safe alongside Streamlit's threads
+    START_METHOD = "spawn"
+    # Rendered PDFs are reused across runs when their inputs are unchanged
+    RENDER_CACHE = True
+    RENDER_CACHE_DIR = OUTPUT_DIR / "render_cache"
+    # Least recently used PDFs are pruned as soon as the cache outgrows this.
+    # A vector-mode LE1 form is about 1.6 MB (raster ones are larger), so
+    # 8 GB keeps about 5000 rows; a batch larger than that re-renders its
+    # oldest rows when it is run again.
+    RENDER_CACHE_MAX_BYTES = 8 * 1024 * 1024 * 1024
+    # Batches run as background jobs stored here, so they survive a
+    # browser refresh and can be resumed after an interruption
+    JOBS_DIR = OUTPUT_DIR / "jobs"
+    MAX_CONCURRENT_JOBS = 1
+    # Finished jobs kept on disk (with their output)
+    JOBS_KEEP = 20
+    # Output is made resumable every this many rows
+    JOB_CHECKPOINT_ROWS = 200
+    # Progress is written to the job store at most this often
+    JOB_SAVE_SECONDS = 2.0
+    # How often the app refreshes a running job's progress
+    JOB_POLL_SECONDS = 1.0
+
+
+class SpreadsheetConfig:
+    """Spreadsheet ingestion"""
+    # Rows read, processed and handed to generation at a time; large files
+    # are streamed in chunks of this size instead of loaded whole
+    CHUNK_ROWS = 5000
+    # Distinct values per date column sampled to pick its format
+    DATE_SAMPLE_SIZE = 500
 
 
 from src.models.field_definition import FieldType
@@ -35,10 +95,67 @@ class FieldConfig:
     """Field configuration"""
     DEFAULT_FONT_SIZE = 9
     DEFAULT_FONT_NAME = "Helvetica"
+    MIN_FONT_SIZE = 6
+    # "truncate" cuts text at max_width; "shrink" lowers the font size first
+    FIT_MODES = ["truncate", "shrink"]
+    TEXT_WIDTH_CACHE_SIZE = 65536
     FIELD_TYPES = [ft.value for ft in FieldType]
 
 
+class FontConfig:
+    """TrueType fonts usable as a template's font_name"""
+    # Font name -> file, looked up in FONT_DIRS in order; fonts whose file
+    # is not found are left out. Base-14 names (Helvetica, ...) need no file
+    FONTS = {
+        "DejaVuSans": "DejaVuSans.ttf",
+        "DejaVuSans-Bold": "DejaVuSans-Bold.ttf",
+    }
+    FONT_DIRS = [
+        BASE_DIR / "assets" / "fonts",
+        Path("/usr/share/fonts/truetype/dejavu"),
+        Path("/usr/share/fonts/TTF"),
+    ]
+    # Checkbox ticks ("✓") are drawn in the first of these that is
+    # available when the field's own font has no tick
+    SYMBOL_FONTS = ["DejaVuSans", "ZapfDingbats"]
+    # Glyphs embedded per output PDF (needs fontTools; otherwise the whole
+    # font is). Text with other characters embeds the whole font instead
+    SUBSET_CHARS = ("".join(map(chr, range(0x20, 0x7F)))
+                    + "".join(map(chr, range(0xA0, 0x180)))
+                    + "‘’“”–—•…€✓✔✗✘")
+
+
 class ExportConfig:
     """Export configuration"""
     PDF_FILENAME_COL = "A1"
-    ZIP_FILENAME = "filled_tax_forms.zip"
\ No newline at end of file
+    ZIP_FILENAME = "filled_tax_forms.zip"
+    # Entries are only deflated if that saves at least this fraction
+    ZIP_MIN_SAVING = 0.05
+    ZIP_SAMPLE_SIZE = 16 * 1024
+    ZIP_COMPRESS_LEVEL = 6
+    ZIP_COMPRESS_WORKERS = os.cpu_count() or 1
+    # Single merged PDF output: one background copy shared by every form
+    OUTPUT_FORMATS = ["zip", "merged"]
+    MERGED_FILENAME = "filled_tax_forms.pdf"
+    MERGED_BOOKMARKS = True
+    # Rows appended to the file per incremental save
+    MERGED_FLUSH_ROWS = 500
+
+
+class CacheConfig:
+    """Upload processing cache settings"""
+    # Rasterized pages, processed spreadsheets and templates, all sessions
+    MAX_BYTES = 512 * 1024 * 1024
+    # Parsed templates on disk, keyed by a hash of the CSV; shared by all
+    # processes, so repeated CLI runs skip parsing and validation
+    TEMPLATE_CACHE = True
+    TEMPLATE_CACHE_DIR = OUTPUT_DIR / "template_cache"
+
+
+class MetricsConfig:
+    """Stage timing instrumentation"""
+    # Record per-stage timings for each batch (shown in the app's timing panel)
+    ENABLED = True
+    # Observations kept per timer for percentiles; counts and totals are exact
+    MAX_SAMPLES = 10000
+    PROMETHEUS_PREFIX = "formfill"
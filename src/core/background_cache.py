@@ -0,0 +1,192 @@
+"""Page Background Cache Module"""
+
+from dataclasses import dataclass
+from io import BytesIO
+from typing import List, Optional, Sequence, Set
+from PIL import Image
+
+from config.settings import PDFConfig
+from src.utils.metrics import timed
+from src.utils.pdf_backend import fitz, require_pymupdf
+
+
+@dataclass
+class PageGeometry:
+    """Where template (image pixel) coordinates land on an output page"""
+    page_width: float
+    page_height: float
+    image_height: float   # height of the image the template was measured on
+    drawn_height: float   # height that image spans on the page, in points
+    x_offset: float = 0.0  # from the left edge
+    y_offset: float = 0.0  # from the top edge
+    page_number: Optional[int] = None  # source page; default: position in the list
+
+
+class BackgroundCache:
+    """
+    Output page backgrounds, encoded once per batch.
+    
+    `base_pdf` holds one page per form page with the background already
+    embedded and compressed; every filled form is a copy of it with text
+    stamped on top, so nothing is re-encoded per row.
+    It is written without a random /ID, so the same inputs give the same
+    bytes and its hash can key cached output.
+    """
+    
+    def __init__(self, base_pdf: bytes, geometry: List[PageGeometry],
+                 widgets: Optional[str] = None):
+        self.base_pdf = base_pdf
+        self.geometry = geometry
+        # "fill" or "flatten" when `base_pdf` keeps its form fields to fill
+        self.widgets = widgets
+    
+    def __len__(self) -> int:
+        return len(self.geometry)
+    
+    @classmethod
+    @timed("background")
+    def from_pdf(cls, pdf_bytes: bytes, dpi: int = PDFConfig.DPI,
+                 wrap_pages: Optional[Set[int]] = None) -> 'BackgroundCache':
+        """
+        Use the original vector pages as backgrounds.
+        Pages in `wrap_pages` (default: all) are wrapped in a form XObject so
+        stamping text never rescans the (large) original page content; pages
+        that never receive text can be copied as they are, which is cheaper.
+        """
+        require_pymupdf()
+        
+        zoom = dpi / 72
+        geometry = []
+        source = fitz.open(stream=pdf_bytes, filetype="pdf")
+        base = fitz.open()
+        
+        for page in source:
+            width, height = page.rect.width, page.rect.height
+            if wrap_pages is None or page.number in wrap_pages:
+                new_page = base.new_page(width=width, height=height)
+                new_page.show_pdf_page(new_page.rect, source, page.number)
+            else:
+                base.insert_pdf(source, from_page=page.number, to_page=page.number)
+            # Template coordinates refer to the page rendered at `dpi`
+            geometry.append(PageGeometry(width, height, height * zoom, height,
+                                         page_number=page.number))
+        
+        base_pdf = base.tobytes(garbage=3, deflate=True, no_new_id=True)
+        base.close()
+        source.close()
+        return cls(base_pdf, geometry)
+    
+    @classmethod
+    @timed("background")
+    def from_form(cls, pdf_bytes: bytes, dpi: int = PDFConfig.DPI,
+                  flatten: bool = PDFConfig.FLATTEN_WIDGETS) -> 'BackgroundCache':
+        """
+        Use the original PDF with its form fields (widgets) kept, to be
+        filled by name; nothing is rasterized or wrapped. With `flatten`,
+        filled fields become plain page content.
+        Template fields without a widget are still drawn at x/y.
+        """
+        require_pymupdf()
+        
+        zoom = dpi / 72
+        base = fitz.open(stream=pdf_bytes, filetype="pdf")
+        if not base.is_form_pdf:
+            base.close()
+            raise ValueError("PDF has no form fields to fill")
+        
+        geometry = [PageGeometry(page.rect.width, page.rect.height,
+                                 page.rect.height * zoom, page.rect.height,
+                                 page_number=page.number)
+                    for page in base]
+        base_pdf = base.tobytes(garbage=3, deflate=True, no_new_id=True)
+        base.close()
+        return cls(base_pdf, geometry, widgets="flatten" if flatten else "fill")
+    
+    @classmethod
+    @timed("background")
+    def from_images(cls,
+                    images: Sequence[Image.Image],
+                    page_numbers: Optional[Sequence[int]] = None,
+                    source_pdf: Optional[bytes] = None,
+                    image_format: str = PDFConfig.BACKGROUND_FORMAT,
+                    quality: int = PDFConfig.BACKGROUND_QUALITY,
+                    dpi: int = PDFConfig.BACKGROUND_DPI,
+                    source_dpi: int = PDFConfig.DPI) -> 'BackgroundCache':
+        """
+        Use rendered page images as backgrounds.
+        Images are downsampled to `dpi` and encoded once as JPEG
+        (`quality` 1-95) or PNG (lossless, Flate-compressed).
+        Only `page_numbers` (default: all) are rasterized, so a lazy page
+        source never renders the others; the other pages are copied as they
+        are from `source_pdf`, the PDF the images were rendered from (left
+        out without it).
+        """
+        require_pymupdf()
+        
+        if image_format not in PDFConfig.BACKGROUND_FORMATS:
+            raise ValueError(f"Unsupported background format: {image_format}")
+        
+        page_width, page_height = PDFConfig.RASTER_PAGE_SIZE
+        geometry = []
+        base = fitz.open()
+        
+        if page_numbers is None:
+            page_numbers = range(len(images))
+        source = fitz.open(stream=source_pdf, filetype="pdf") if source_pdf is not None else None
+        rasterized = set(page_numbers)
+        
+        for page_number in range(len(images)):
+            if page_number not in rasterized:
+                if source is not None:
+                    # No fields are drawn here, so the vector page is kept
+                    rect = source[page_number].rect
+                    base.insert_pdf(source, from_page=page_number, to_page=page_number)
+                    geometry.append(PageGeometry(rect.width, rect.height,
+                                                 rect.height * source_dpi / 72, rect.height,
+                                                 page_number=page_number))
+                continue
+            
+            page_img = images[page_number]
+            img_width, img_height = page_img.size
+            
+            # Fit the image on the page, centred
+            scale = min(page_width / img_width, page_height / img_height)
+            scaled_width = img_width * scale
+            scaled_height = img_height * scale
+            
+            x_offset = (page_width - scaled_width) / 2
+            y_offset = (page_height - scaled_height) / 2
+            
+            page = base.new_page(width=page_width, height=page_height)
+            rect = fitz.Rect(x_offset, y_offset,
+                             x_offset + scaled_width, y_offset + scaled_height)
+            page.insert_image(rect, stream=cls._encode(
+                page_img, image_format, quality, dpi / source_dpi
+            ))
+            
+            # Geometry stays in terms of the full-resolution image,
+            # which is what the template coordinates refer to
+            geometry.append(PageGeometry(page_width, page_height, img_height,
+                                         scaled_height, x_offset, y_offset, page_number))
+        
+        base_pdf = base.tobytes(garbage=3, deflate=True, no_new_id=True)
+        base.close()
+        if source is not None:
+            source.close()
+        return cls(base_pdf, geometry)
+    
+    @staticmethod
+    def _encode(image: Image.Image, image_format: str,
+                quality: int, resample_ratio: float) -> bytes:
+        """Encode a page image once"""
+        if resample_ratio < 1:
+            size = (max(1, round(image.width * resample_ratio)),
+                    max(1, round(image.height * resample_ratio)))
+            image = image.resize(size, Image.LANCZOS)
+        
+        buffer = BytesIO()
+        if image_format == "JPEG":
+            image.convert("RGB").save(buffer, "JPEG", quality=quality)
+        else:
+            image.save(buffer, "PNG")
+        return buffer.getvalue()
@@ -0,0 +1,235 @@
+"""Batch PDF Generation Module"""
+
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import pandas as pd
+
+from config.settings import GenerationConfig
+from src.models.form_template import FormTemplate
+from src.models.render_plan import RenderPlan
+from src.core.background_cache import BackgroundCache
+from src.core.pdf_generator import PDFGenerator
+from src.core.render_cache import RenderCache
+from src.utils import metrics
+from src.utils.font_registry import FontRegistry
+from src.utils.metrics import MetricsRegistry
+
+
+# Passed to the renderer in place of a row: yield output before reading on
+_FLUSH = object()
+
+# Per-process state, set once by _init_worker
+_worker_background: Optional[BackgroundCache] = None
+_worker_plan: Optional[RenderPlan] = None
+_worker_metrics = False
+
+
+def _init_worker(background: BackgroundCache, plan: RenderPlan, collect_metrics: bool = False):
+    """Receive the shared batch inputs once per worker process"""
+    global _worker_background, _worker_plan, _worker_metrics
+    _worker_background = background
+    _worker_plan = plan
+    _worker_metrics = collect_metrics
+    # Parse the plan's fonts before the first row rather than during it
+    FontRegistry.warm(plan.font_names)
+
+
+def _render_chunk(rows: List[Sequence[Any]]) -> Tuple[List[bytes], Optional[dict]]:
+    """
+    Render a chunk of rows inside a worker process. Timings recorded
+    meanwhile are returned for the parent's registry.
+    """
+    if not _worker_metrics:
+        return [_render_worker_row(row) for row in rows], None
+    registry = MetricsRegistry()
+    with registry.activate():
+        pdfs = [_render_worker_row(row) for row in rows]
+    return pdfs, registry.export_state()
+
+
+def _render_worker_row(row: Sequence[Any]) -> bytes:
+    return PDFGenerator.create_filled_pdf(_worker_background, _worker_plan, row).getvalue()
+
+
+class BatchGenerator:
+    """Render filled PDFs for many rows, spread across worker processes"""
+    
+    def __init__(self,
+                 background: BackgroundCache,
+                 template: FormTemplate,
+                 mapping: Dict[str, str],
+                 workers: int = GenerationConfig.MAX_WORKERS,
+                 chunk_size: int = GenerationConfig.CHUNK_SIZE,
+                 max_in_flight: Optional[int] = None,
+                 cache: Optional[RenderCache] = None):
+        self.background = background
+        # Coordinates, fonts and column positions are resolved once here
+        self.plan = template.compile_plan(background.geometry, mapping,
+                                          widgets=background.widgets is not None)
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.max_in_flight = max_in_flight or self.workers * GenerationConfig.MAX_IN_FLIGHT_PER_WORKER
+        self.cache = cache
+        # Counts for the last generate() call
+        self.reused = 0
+        self.rendered = 0
+    
+    def generate(self, rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+        """
+        Yield one PDF per row from `data_rows`, in row order.
+        With a cache, rows rendered before with the same inputs are reused
+        and only the others are rendered.
+        """
+        self.reused = 0
+        self.rendered = 0
+        
+        if self.cache is None:
+            for pdf in self._render_rows(rows):
+                self.rendered += 1
+                yield pdf
+            metrics.increment("rows_rendered", self.rendered)
+            return
+        
+        batch_key = RenderCache.batch_key(self.background, self.plan)
+        # Rows are looked up as the renderer reads ahead, so rendering starts
+        # before all rows have arrived. Both queues are in row order: `order`
+        # holds the rows read and not yet yielded, `results` the rendered
+        # PDFs of misses. Reading ahead stops at `lookahead` rows.
+        lookahead = self.max_in_flight * self.chunk_size
+        order = deque()
+        results = deque()
+        # Repeats of a row are cached by the time they are reached
+        seen = set()
+        
+        def misses() -> Iterator[Any]:
+            for row in rows:
+                fp = RenderCache.fingerprint(batch_key, row)
+                hit = fp in seen or self.cache.contains(fp)
+                seen.add(fp)
+                order.append((row, fp, hit))
+                if not hit:
+                    yield row
+                if order and (order[0][2] or len(order) >= lookahead):
+                    # Cached rows can go out now, or enough has been read
+                    yield _FLUSH
+        
+        rendered = self._render_rows(misses())
+        exhausted = False
+        try:
+            while order or not exhausted:
+                if not exhausted and (not order or (not order[0][2] and not results)):
+                    # Pull the next rendered miss; reading ahead for it queues rows
+                    try:
+                        pdf = next(rendered)
+                    except StopIteration:
+                        exhausted = True
+                        continue
+                    if pdf is not None:
+                        results.append(pdf)
+                    continue
+                
+                row, fp, hit = order.popleft()
+                pdf = self.cache.get(fp) if hit else None
+                if pdf is not None:
+                    self.reused += 1
+                else:
+                    # A hit pruned since the lookup is rendered here
+                    pdf = self._render(row) if hit else results.popleft()
+                    self.rendered += 1
+                    self.cache.put(fp, pdf)
+                yield pdf
+        finally:
+            # Stops the process pool when the consumer stops early
+            rendered.close()
+        
+        metrics.increment("rows_rendered", self.rendered)
+        metrics.increment("rows_reused", self.reused)
+    
+    def _render_rows(self, rows: Iterable[Any]) -> Iterator[Optional[bytes]]:
+        """
+        Render rows in order. With several workers, chunks of rows go to a
+        process pool, started once there is a full chunk of work; at most
+        `max_in_flight` chunks are pending at any time, so memory stays flat
+        however many rows are fed in.
+        A _FLUSH among the rows asks for output before more rows are read:
+        the oldest pending chunk, else the rows read since, else None.
+        """
+        if self.workers == 1:
+            for row in rows:
+                yield None if row is _FLUSH else self._render(row)
+            return
+        
+        registry = metrics.active_registry()
+        executor = None
+        pending = deque()
+        chunk = []
+        
+        def collect(future) -> List[bytes]:
+            pdfs, worker_metrics = future.result()
+            if registry is not None and worker_metrics:
+                registry.merge(worker_metrics)
+            return pdfs
+        
+        try:
+            for row in rows:
+                if row is _FLUSH:
+                    if pending:
+                        yield from collect(pending.popleft())
+                    elif chunk and executor is None:
+                        # Not worth starting the pool for less than a chunk
+                        for waiting in chunk:
+                            yield self._render(waiting)
+                        chunk = []
+                    elif chunk:
+                        # A partial chunk, spread over the otherwise idle workers
+                        size = -(-len(chunk) // self.workers)
+                        futures = [executor.submit(_render_chunk, chunk[i:i + size])
+                                   for i in range(0, len(chunk), size)]
+                        for future in futures:
+                            yield from collect(future)
+                        chunk = []
+                    else:
+                        yield None
+                    continue
+                
+                chunk.append(row)
+                if len(chunk) < self.chunk_size:
+                    continue
+                if executor is None:
+                    executor = self._start_pool(registry is not None)
+                pending.append(executor.submit(_render_chunk, chunk))
+                chunk = []
+                if len(pending) >= self.max_in_flight:
+                    yield from collect(pending.popleft())
+            
+            # A pool is not worth starting for a single, partial chunk
+            if chunk and executor is not None:
+                pending.append(executor.submit(_render_chunk, chunk))
+                chunk = []
+            while pending:
+                yield from collect(pending.popleft())
+            for row in chunk:
+                yield self._render(row)
+        finally:
+            # Also reached when the consumer stops early
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+    
+    def data_rows(self, df: pd.DataFrame) -> Iterator[tuple]:
+        """Processed rows as tuples of display strings for the plan"""
+        return PDFGenerator.format_rows(self.plan, df)
+    
+    def _render(self, row: Sequence[Any]) -> bytes:
+        """Render one row in the calling process"""
+        return PDFGenerator.create_filled_pdf(self.background, self.plan, row).getvalue()
+    
+    def _start_pool(self, collect_metrics: bool) -> ProcessPoolExecutor:
+        """Worker processes with the batch's background and plan"""
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(GenerationConfig.START_METHOD),
+            initializer=_init_worker,
+            initargs=(self.background, self.plan, collect_metrics)
+        )
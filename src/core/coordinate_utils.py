@@ -17,4 +17,17 @@ class CoordinateUtils:
         scale = pdf_height / image_height
         pdf_x = x * scale
         pdf_y = pdf_height - (y * scale)
-        return pdf_x, pdf_y
\ No newline at end of file
+        return pdf_x, pdf_y
+    
+    @staticmethod
+    def image_to_page(x: float,
+                      y: float,
+                      image_height: float,
+                      page_height: float = 792) -> tuple:
+        """
+        Convert image coords to PDF page coords
+        Page origin: top-left (PyMuPDF convention)
+        Image origin: top-left
+        """
+        scale = page_height / image_height
+        return x * scale, y * scale
\ No newline at end of file
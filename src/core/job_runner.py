@@ -0,0 +1,462 @@
+"""Background Generation Jobs"""
+
+import dataclasses
+import io
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+import pandas as pd
+
+from config.settings import GenerationConfig, ExportConfig, MetricsConfig
+from src.models.form_template import FormTemplate
+from src.core.background_cache import BackgroundCache
+from src.core.batch_generator import BatchGenerator
+from src.core.merged_writer import MergedPDFWriter
+from src.core.render_cache import RenderCache
+from src.utils.archive_writer import ArchiveWriter, ArchiveStats
+from src.utils.file_utils import FileUtils
+from src.utils.metrics import MetricsRegistry, increment, timer
+
+ACTIVE_STATUSES = ["queued", "running"]
+# Stopped before the last row; the output is complete up to the checkpoint
+RESUMABLE_STATUSES = ["cancelled", "failed", "interrupted"]
+
+
+@dataclass
+class JobInputs:
+    """Everything a job renders from, stored with it so it can be resumed"""
+    background: BackgroundCache
+    template: FormTemplate
+    mapping: Dict[str, str]
+    data: pd.DataFrame       # processed rows
+    names: List[str]         # ExportConfig.PDF_FILENAME_COL value per row
+    output: str = "zip"      # one of ExportConfig.OUTPUT_FORMATS
+    bookmarks: bool = ExportConfig.MERGED_BOOKMARKS
+
+
+@dataclass
+class Job:
+    """State of one job, as kept in its job.json"""
+    job_id: str
+    total: int
+    output: str
+    status: str = "queued"
+    completed: int = 0
+    rendered: int = 0
+    reused: int = 0
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    updated: float = field(default_factory=time.time)
+    # Output state as of the last checkpoint (rows written, file offsets)
+    checkpoint: dict = field(default_factory=dict)
+    # ArchiveStats of a finished or cancelled ZIP output
+    archive: dict = field(default_factory=dict)
+    
+    @property
+    def progress(self) -> float:
+        return self.completed / self.total if self.total else 1.0
+    
+    @property
+    def resumable(self) -> bool:
+        return self.status in RESUMABLE_STATUSES
+
+
+class JobStore:
+    """Jobs on disk: one directory per job with its state, inputs and output"""
+    
+    def __init__(self, directory: Path = GenerationConfig.JOBS_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def create(self, inputs: JobInputs) -> Job:
+        """Store a new job and its inputs"""
+        job = Job(job_id=uuid.uuid4().hex[:12], total=len(inputs.data), output=inputs.output)
+        job_dir = self.directory / job.job_id
+        job_dir.mkdir()
+        with open(job_dir / "inputs.pkl", 'wb') as f:
+            pickle.dump(inputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.save(job)
+        return job
+    
+    def save(self, job: Job):
+        """Write a job's state atomically"""
+        job.updated = time.time()
+        path = self.directory / job.job_id / "job.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(dataclasses.asdict(job)))
+        os.replace(tmp_path, path)
+    
+    def load(self, job_id: str) -> Job:
+        path = self.directory / job_id / "job.json"
+        if not path.exists():
+            raise ValueError(f"Unknown job: {job_id}")
+        return Job(**json.loads(path.read_text()))
+    
+    def load_inputs(self, job_id: str) -> JobInputs:
+        with open(self.directory / job_id / "inputs.pkl", 'rb') as f:
+            return pickle.load(f)
+    
+    def jobs(self) -> List[Job]:
+        """All stored jobs, newest first"""
+        jobs = []
+        for path in self.directory.glob("*/job.json"):
+            try:
+                jobs.append(self.load(path.parent.name))
+            except (ValueError, json.JSONDecodeError):
+                continue
+        return sorted(jobs, key=lambda job: job.created, reverse=True)
+    
+    def output_path(self, job: Job) -> Path:
+        suffix = ".pdf" if job.output == "merged" else ".zip"
+        return self.directory / job.job_id / f"output{suffix}"
+    
+    def open_output(self, job: Job) -> BinaryIO:
+        """The job's output, as of its last checkpoint if it did not complete"""
+        path = self.output_path(job)
+        if job.status == "completed":
+            return open(path, 'rb')
+        if job.output == "merged":
+            return io.BufferedReader(CheckpointFile(path, job.checkpoint["size"]))
+        tail = (path.parent / job.checkpoint["tail"]).read_bytes()
+        return io.BufferedReader(CheckpointFile(path, job.checkpoint["entries_end"], tail))
+    
+    def metrics_path(self, job_id: str) -> Path:
+        return self.directory / job_id / "metrics.json"
+    
+    def delete(self, job_id: str):
+        shutil.rmtree(self.directory / job_id, ignore_errors=True)
+    
+    def prune(self, keep: int = GenerationConfig.JOBS_KEEP, exclude=()):
+        """Delete the oldest finished jobs beyond `keep`"""
+        finished = [job for job in self.jobs()
+                    if job.status not in ACTIVE_STATUSES and job.job_id not in exclude]
+        for job in finished[keep:]:
+            self.delete(job.job_id)
+
+
+class CheckpointFile(io.RawIOBase):
+    """
+    Read-only view of an output file as of a checkpoint: its first `size`
+    bytes followed by `tail`. Rows written after the checkpoint, and a
+    file left unfinished when its process died, are not part of it.
+    """
+    
+    def __init__(self, path: Path, size: int, tail: bytes = b""):
+        self._file = open(path, 'rb')
+        self._size = size
+        self._tail = tail
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._size + len(self._tail)
+        self._pos = max(0, offset)
+        return self._pos
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def readinto(self, buffer) -> int:
+        if self._pos < self._size:
+            self._file.seek(self._pos)
+            data = self._file.read(min(len(buffer), self._size - self._pos))
+        else:
+            start = self._pos - self._size
+            data = self._tail[start:start + len(buffer)]
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+    
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class ResumableZip:
+    """
+    ZIP output that can be continued after an interruption.
+    
+    A checkpoint finishes the archive on disk and keeps a copy of its
+    central directory, which the next entries overwrite. Resuming cuts
+    the file back to the checkpoint's entries and puts that copy back.
+    """
+    
+    def __init__(self, path: Path, state: Optional[dict] = None):
+        self.path = Path(path)
+        self.rows = 0
+        self.stats = ArchiveStats()
+        self._tails = deque()
+        
+        if state and state.get("rows"):
+            tail_path = self.path.parent / state["tail"]
+            self.file = open(self.path, 'r+b')
+            self.file.truncate(state["entries_end"])
+            self.file.seek(0, os.SEEK_END)
+            self.file.write(tail_path.read_bytes())
+            self.file.seek(0)
+            self.rows = state["rows"]
+            self.stats = ArchiveStats(**state.get("stats", {}))
+            self._tails.append(tail_path)
+            # Copies from after the checkpoint belong to discarded entries
+            for stale in self.path.parent.glob(f"{self.path.stem}.*.tail"):
+                if stale != tail_path:
+                    stale.unlink(missing_ok=True)
+        else:
+            self.file = open(self.path, 'w+b')
+        self.archive = ArchiveWriter(self.file, append=self.rows > 0)
+    
+    def add(self, filename: str, data: bytes):
+        self.archive.add(filename, data)
+        self.rows += 1
+    
+    def checkpoint(self) -> dict:
+        """Make the archive complete up to here; returns the state to resume from"""
+        self._finish()
+        entries_end = self.archive.entries_end
+        self.file.seek(entries_end)
+        tail_path = self.path.parent / f"{self.path.stem}.{self.rows}.tail"
+        tail_path.write_bytes(self.file.read())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        
+        # The job's state may still point at the previous copy until saved
+        if tail_path not in self._tails:
+            self._tails.append(tail_path)
+        while len(self._tails) > 2:
+            self._tails.popleft().unlink(missing_ok=True)
+        
+        self.file.seek(0)
+        self.archive = ArchiveWriter(self.file, append=True)
+        return {"rows": self.rows, "entries_end": entries_end, "tail": tail_path.name,
+                "stats": dataclasses.asdict(self.stats)}
+    
+    def close(self, resumable: bool = False) -> int:
+        """
+        Finish the archive; returns the number of rows. With `resumable`,
+        the last checkpoint is kept so the archive can still be continued.
+        """
+        try:
+            self._finish()
+        finally:
+            self.file.close()
+        if resumable and self._tails:
+            self._tails.pop()
+        for tail_path in self._tails:
+            tail_path.unlink(missing_ok=True)
+        return self.rows
+    
+    def abort(self):
+        """Stop without finishing; the last checkpoint stays resumable"""
+        try:
+            self.archive.close()
+        except Exception:
+            pass
+        self.file.close()
+    
+    def _finish(self):
+        """Close the current writer and add up what it wrote"""
+        stats = self.archive.close()
+        self.stats.merge(stats)
+        increment("zip_output_bytes", stats.output_bytes)
+
+
+class JobRunner:
+    """
+    Run generation jobs on background threads, off the Streamlit script thread.
+    
+    Live progress is kept in memory for polling and written to the job store
+    at most every JOB_SAVE_SECONDS. Every JOB_CHECKPOINT_ROWS rows the output
+    file is made complete up to that row, so a cancelled, failed or
+    interrupted job (e.g. by a server restart) resumes from its last
+    checkpoint instead of starting over.
+    """
+    
+    def __init__(self, store: Optional[JobStore] = None,
+                 max_concurrent: int = GenerationConfig.MAX_CONCURRENT_JOBS):
+        self.store = store or JobStore()
+        self._lock = threading.Lock()
+        self._live: Dict[str, Job] = {}
+        self._cancel: Dict[str, threading.Event] = {}
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+    
+    def submit(self, inputs: JobInputs, metrics_state: Optional[dict] = None) -> str:
+        """Store and start a job; returns its id"""
+        with self._lock:
+            live = set(self._live)
+        self.store.prune(exclude=live)
+        job = self.store.create(inputs)
+        if metrics_state:
+            self.store.metrics_path(job.job_id).write_text(json.dumps(metrics_state))
+        self._start(job)
+        return job.job_id
+    
+    def resume(self, job_id: str):
+        """Continue a stopped job from its last checkpoint"""
+        job = self.get(job_id)
+        if not job.resumable:
+            raise ValueError(f"Job {job_id} is {job.status} and cannot be resumed")
+        job.status = "queued"
+        job.error = None
+        job.completed = job.checkpoint.get("rows", 0)
+        self.store.save(job)
+        self._start(job)
+    
+    def cancel(self, job_id: str):
+        """Ask a job to stop after the current row"""
+        with self._lock:
+            if job_id in self._cancel:
+                self._cancel[job_id].set()
+    
+    def get(self, job_id: str) -> Job:
+        """Current state of a job (a copy)"""
+        with self._lock:
+            if job_id in self._live:
+                return dataclasses.replace(self._live[job_id])
+        
+        job = self.store.load(job_id)
+        if job.status in ACTIVE_STATUSES:
+            # Stored as active but not running here: the process running it died
+            job.status = "interrupted"
+        return job
+    
+    def jobs(self) -> List[Job]:
+        """All jobs, newest first"""
+        return [self.get(job.job_id) for job in self.store.jobs()]
+    
+    def metrics(self, job_id: str) -> Optional[MetricsRegistry]:
+        """Timings recorded for a job, across all its runs"""
+        path = self.store.metrics_path(job_id)
+        if not path.exists():
+            return None
+        registry = MetricsRegistry()
+        registry.merge(json.loads(path.read_text()))
+        return registry
+    
+    def _start(self, job: Job):
+        cancel = threading.Event()
+        with self._lock:
+            self._live[job.job_id] = job
+            self._cancel[job.job_id] = cancel
+        threading.Thread(target=self._run, args=(job, cancel),
+                         name=f"job-{job.job_id}", daemon=True).start()
+    
+    def _run(self, job: Job, cancel: threading.Event):
+        """Thread body: wait for a slot, generate, record the outcome"""
+        registry = MetricsRegistry() if MetricsConfig.ENABLED else None
+        
+        with self._slots:
+            try:
+                with registry.activate() if registry is not None else nullcontext():
+                    self._update(job, status="running")
+                    with timer("batch"):
+                        self._generate(job, cancel)
+                status = "cancelled" if job.completed < job.total else "completed"
+                self._update(job, status=status)
+            except Exception as e:
+                self._update(job, status="failed", error=str(e))
+            finally:
+                if registry is not None:
+                    self._save_metrics(job.job_id, registry)
+                self.store.save(job)
+                with self._lock:
+                    self._live.pop(job.job_id, None)
+                    self._cancel.pop(job.job_id, None)
+    
+    def _generate(self, job: Job, cancel: threading.Event):
+        """Render the job's remaining rows into its output file"""
+        inputs = self.store.load_inputs(job.job_id)
+        cache = RenderCache() if GenerationConfig.RENDER_CACHE else None
+        generator = BatchGenerator(inputs.background, inputs.template, inputs.mapping, cache=cache)
+        path = self.store.output_path(job)
+        start = job.checkpoint.get("rows", 0)
+        rows = islice(generator.data_rows(inputs.data), start, None)
+        
+        if job.output == "merged":
+            # Merged output is drawn row by row into one document
+            if start:
+                writer = MergedPDFWriter.resume(path, inputs.background, generator.plan,
+                                                job.checkpoint, inputs.names, inputs.bookmarks)
+            else:
+                writer = MergedPDFWriter(path, inputs.background, generator.plan,
+                                         bookmarks=inputs.bookmarks)
+            items = rows
+        else:
+            writer = ResumableZip(path, job.checkpoint)
+            items = generator.generate(rows)
+        
+        rendered, reused = job.rendered, job.reused
+        last_save = time.monotonic()
+        try:
+            for idx, item in enumerate(items, start):
+                if cancel.is_set():
+                    break
+                
+                if job.output == "merged":
+                    writer.add(item, inputs.names[idx])
+                    rendered += 1
+                else:
+                    writer.add(FileUtils.safe_filename(inputs.names[idx]), item)
+                
+                checkpointed = (idx + 1 - start) % GenerationConfig.JOB_CHECKPOINT_ROWS == 0
+                self._update(job, completed=idx + 1,
+                             checkpoint=writer.checkpoint() if checkpointed else job.checkpoint,
+                             rendered=rendered + generator.rendered, reused=reused + generator.reused)
+                
+                if checkpointed or time.monotonic() - last_save >= GenerationConfig.JOB_SAVE_SECONDS:
+                    self.store.save(job)
+                    last_save = time.monotonic()
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            # Stops the process pool when the job ends early
+            if hasattr(items, "close"):
+                items.close()
+        
+        if job.completed == job.total:
+            writer.close()
+        elif job.completed:
+            # Cancelled: the partial file is usable, and resumable from here
+            self._update(job, checkpoint=writer.checkpoint())
+            writer.close(resumable=True)
+        else:
+            writer.abort()
+            return
+        
+        if job.output != "merged":
+            self._update(job, archive=dataclasses.asdict(writer.stats))
+    
+    def _update(self, job: Job, **changes):
+        """Change a live job's fields atomically for pollers"""
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+    
+    def _save_metrics(self, job_id: str, registry: MetricsRegistry):
+        """Add this run's timings to the job's"""
+        previous = self.metrics(job_id)
+        if previous is not None:
+            registry.merge(previous.export_state())
+        self.store.metrics_path(job_id).write_text(json.dumps(registry.export_state()))
+
+
+# Process-wide runner shared by all sessions
+job_runner = JobRunner()
\ No newline at end of file
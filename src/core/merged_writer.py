@@ -0,0 +1,194 @@
+"""Merged PDF Writer"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import ExportConfig
+from src.models.render_plan import RenderPlan
+from src.core.background_cache import BackgroundCache
+from src.core.pdf_generator import PDFGenerator
+from src.utils.metrics import timed
+from src.utils.pdf_backend import fitz, require_pymupdf
+
+
+class MergedPDFWriter:
+    """
+    Write every row's filled form into one PDF on disk.
+    
+    Each background page is embedded once, as a form XObject, and every
+    output page references it, so a row only adds its own text to the file.
+    Rows are appended with incremental saves every `flush_rows` rows, so
+    large batches stream to disk. With `bookmarks`, each row gets an outline
+    entry pointing at its first page.
+    A `checkpoint()` can be resumed after an interruption with `resume()`.
+    Form PDFs whose fields are filled (see BackgroundCache.from_form) are
+    copied whole per row, with the fields flattened.
+    """
+    
+    def __init__(self, path, background: BackgroundCache, plan: RenderPlan,
+                 bookmarks: bool = ExportConfig.MERGED_BOOKMARKS,
+                 flush_rows: int = ExportConfig.MERGED_FLUSH_ROWS):
+        require_pymupdf()
+        
+        self.path = str(path)
+        self.background = background
+        self.plan = plan
+        self.bookmarks = bookmarks
+        self.flush_rows = max(1, flush_rows)
+        self.rows = 0
+        self._source = fitz.open(stream=background.base_pdf, filetype="pdf")
+        self._doc = fitz.open()
+        # Background page index -> (XObject resource dict, content stream xref)
+        self._shared: Dict[int, Tuple[str, int]] = {}
+        self._toc: List[list] = []
+        self._unsaved = 0
+    
+    @classmethod
+    def resume(cls, path, background: BackgroundCache, plan: RenderPlan, state: dict,
+               titles: Sequence[Optional[str]] = (),
+               bookmarks: bool = ExportConfig.MERGED_BOOKMARKS,
+               flush_rows: int = ExportConfig.MERGED_FLUSH_ROWS) -> 'MergedPDFWriter':
+        """
+        Continue a file from a `checkpoint()` state. Anything written after
+        the checkpoint is discarded; `titles` are the bookmarks of the rows
+        already written.
+        """
+        # Incremental saves only append, so the file as of the checkpoint
+        # is its first `size` bytes
+        with open(path, 'r+b') as f:
+            f.truncate(state["size"])
+        
+        writer = cls(path, background, plan, bookmarks, flush_rows)
+        writer._doc.close()
+        writer._doc = fitz.open(writer.path)
+        writer.rows = state["rows"]
+        writer._shared = {int(index): tuple(shared) for index, shared in state["shared"].items()}
+        if bookmarks:
+            pages_per_row = len(background)
+            writer._toc = [[1, title, i * pages_per_row + 1]
+                           for i, title in enumerate(titles[:writer.rows]) if title is not None]
+        return writer
+    
+    def __enter__(self) -> 'MergedPDFWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave no half-written file behind
+            self.abort()
+            Path(self.path).unlink(missing_ok=True)
+    
+    @timed("merge_row")
+    def add(self, row: Sequence[Any], title: Optional[str] = None):
+        """Append one row's pages (a row from `PDFGenerator.format_rows`)"""
+        first_page = len(self._doc)
+        
+        if self.background.widgets:
+            self._add_filled_form(row)
+        else:
+            self._add_shared(row)
+        
+        if self.bookmarks and title is not None:
+            self._toc.append([1, title, first_page + 1])
+        
+        self.rows += 1
+        self._unsaved += 1
+        if self._unsaved >= self.flush_rows:
+            self._flush()
+    
+    def _add_filled_form(self, row: Sequence[Any]):
+        """
+        Append a row's filled copy of a form PDF. Its fields are flattened:
+        every row's fields have the same names, so they cannot stay fields
+        in one document.
+        """
+        filled = fitz.open(stream=self.background.base_pdf, filetype="pdf")
+        PDFGenerator.fill_document(filled, self.plan, row, flatten=True)
+        self._doc.insert_pdf(filled)
+        filled.close()
+    
+    def _add_shared(self, row: Sequence[Any]):
+        """Append a row's pages drawn over the shared background XObjects"""
+        for index, (geometry, planned_fields) in enumerate(zip(self.background.geometry, self.plan.pages)):
+            page = self._doc.new_page(width=geometry.page_width, height=geometry.page_height)
+            page_xref = page.xref
+            
+            if index not in self._shared:
+                # First use: embed the background page as a form XObject
+                page.show_pdf_page(page.rect, self._source, index)
+                self._shared[index] = (self._doc.xref_get_key(page_xref, "Resources/XObject")[1],
+                                       page.get_contents()[0])
+                if planned_fields:
+                    PDFGenerator.stamp_page(page, planned_fields, row)
+                continue
+            
+            # Text goes on first, while the page has no XObject whose
+            # resources would be rescanned for every inserted string
+            if planned_fields:
+                PDFGenerator.stamp_page(page, planned_fields, row)
+            self._attach_background(page_xref, page.get_contents(), index)
+    
+    def checkpoint(self) -> dict:
+        """Save the rows added so far; returns the state `resume()` needs"""
+        if self._unsaved:
+            self._flush()
+        return {
+            "rows": self.rows,
+            "size": os.path.getsize(self.path) if self.rows else 0,
+            "shared": {str(index): list(shared) for index, shared in self._shared.items()},
+        }
+    
+    def close(self, resumable: bool = False) -> int:
+        """
+        Add bookmarks and finish the file; returns the number of rows.
+        The file stays resumable from its last checkpoint either way.
+        """
+        try:
+            if not self.rows:
+                raise ValueError("No rows to write")
+            if self._toc:
+                self._doc.set_toc(self._toc)
+                self._unsaved += 1
+            if self._unsaved:
+                self._flush()
+        finally:
+            self._doc.close()
+            self._source.close()
+        return self.rows
+    
+    def abort(self):
+        """Stop without finishing the file; saved rows stay on disk"""
+        self._doc.close()
+        self._source.close()
+    
+    def _attach_background(self, page_xref: int, contents: List[int], index: int):
+        """Draw the shared background XObject underneath the page's text"""
+        xobjects, background_contents = self._shared[index]
+        
+        kind, resources = self._doc.xref_get_key(page_xref, "Resources")
+        if kind == "xref":
+            self._doc.xref_set_key(int(resources.split()[0]), "XObject", xobjects)
+        else:
+            self._doc.xref_set_key(page_xref, "Resources/XObject", xobjects)
+        
+        streams = " ".join(f"{xref} 0 R" for xref in [background_contents] + contents)
+        self._doc.xref_set_key(page_xref, "Contents", f"[{streams}]")
+    
+    def _flush(self):
+        """Append pending pages to the file"""
+        if self._doc.name:
+            self._doc.saveIncr()
+        else:
+            # Incremental saves need a document opened from a file; object
+            # numbers are kept, so the shared background xrefs stay valid
+            tmp_path = f"{self.path}.tmp"
+            self._doc.save(tmp_path, deflate=True)
+            os.replace(tmp_path, self.path)
+        # Reopened so the next save appends a new section instead of
+        # rewriting this one, which keeps checkpoint sizes valid
+        self._doc.close()
+        self._doc = fitz.open(self.path)
+        self._unsaved = 0
\ No newline at end of file
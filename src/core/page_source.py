@@ -0,0 +1,83 @@
+"""Lazy Page Rasterization Module"""
+
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Tuple
+from PIL import Image
+
+from config.settings import PDFConfig
+from src.core.pdf_processor import PDFProcessor
+from src.utils.pdf_backend import fitz, require_pymupdf
+
+
+class LazyPageSource:
+    """
+    Pages of a PDF, rasterized on first access.
+    
+    Page count and pixel sizes are read from the PDF without rendering.
+    Rendered pages are kept in an LRU cache bounded by `max_bytes`, so only
+    pages that are actually used cost memory.
+    """
+    
+    def __init__(self, pdf_bytes: bytes, dpi: int = PDFConfig.DPI,
+                 max_bytes: int = PDFConfig.PAGE_CACHE_BYTES):
+        require_pymupdf()
+        
+        self.pdf_bytes = pdf_bytes
+        self.dpi = dpi
+        self.max_bytes = max_bytes
+        self._processor = PDFProcessor(dpi=dpi)
+        self._pages = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        try:
+            pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
+            self._sizes = [self._processor.page_pixel_size(page) for page in pdf_document]
+            pdf_document.close()
+        except Exception as e:
+            raise ValueError(f"Failed to open PDF: {str(e)}")
+    
+    def __len__(self) -> int:
+        return len(self._sizes)
+    
+    def __iter__(self) -> Iterator[Image.Image]:
+        for page_num in range(len(self)):
+            yield self[page_num]
+    
+    def __getitem__(self, page_num: int) -> Image.Image:
+        """Page image, rendered now if it is not cached"""
+        if not 0 <= page_num < len(self):
+            raise IndexError(f"Page {page_num} out of range")
+        
+        with self._lock:
+            if page_num in self._pages:
+                self._pages.move_to_end(page_num)
+                return self._pages[page_num]
+            
+            pdf_document = fitz.open(stream=self.pdf_bytes, filetype="pdf")
+            image = self._processor.render_page(pdf_document, page_num)
+            pdf_document.close()
+            
+            # A page larger than the whole budget is returned but not kept
+            size = image.width * image.height * len(image.getbands())
+            if size <= self.max_bytes:
+                self._pages[page_num] = image
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._pages.popitem(last=False)
+                    self._bytes -= evicted.width * evicted.height * len(evicted.getbands())
+            return image
+    
+    def page_size(self, page_num: int) -> Tuple[int, int]:
+        """(width, height) in pixels of a page at `dpi`"""
+        return self._sizes[page_num]
+    
+    @property
+    def rendered_pages(self) -> List[int]:
+        """Pages currently held in memory"""
+        return list(self._pages)
+    
+    def cache_size(self) -> int:
+        """Memory held now (the PDF and rendered pages), for ContentCache accounting"""
+        return len(self.pdf_bytes) + self._bytes
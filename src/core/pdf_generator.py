@@ -0,0 +1,103 @@
+"""PDF Generation Module"""
+
+from io import BytesIO
+from typing import Iterator, Sequence, Tuple
+import pandas as pd
+
+from src.models.render_plan import PlannedField, RenderPlan
+from src.core.background_cache import BackgroundCache
+from src.core.pdf_processor import PDFProcessor
+from src.utils.text_utils import TextUtils
+from src.utils.text_fitter import TextFitter
+from src.utils.font_registry import FontRegistry
+from src.utils.metrics import timed, timer
+from src.utils.pdf_backend import fitz, require_pymupdf
+
+
+class PDFGenerator:
+    """Generate filled PDFs"""
+    
+    # Bump when output changes, to invalidate cached PDFs
+    VERSION = 2
+    
+    @staticmethod
+    @timed("create_filled_pdf")
+    def create_filled_pdf(background: BackgroundCache,
+                         plan: RenderPlan,
+                         row: Sequence[str]) -> BytesIO:
+        
+        """Create PDF with overlaid data for one row from `format_rows`"""
+        
+        require_pymupdf()
+        
+        pdf_document = fitz.open(stream=background.base_pdf, filetype="pdf")
+        PDFGenerator.fill_document(pdf_document, plan, row,
+                                   flatten=background.widgets == "flatten")
+        
+        pdf_buffer = BytesIO(pdf_document.tobytes(deflate=True))
+        pdf_document.close()
+        return pdf_buffer
+    
+    @staticmethod
+    def fill_document(pdf_document, plan: RenderPlan, row: Sequence[str], flatten: bool = False):
+        """Draw a row's values onto a copy of the background and fill its widgets"""
+        for page, planned_fields in zip(pdf_document, plan.pages):
+            if planned_fields:
+                PDFGenerator.stamp_page(page, planned_fields, row)
+        
+        if plan.widgets:
+            values = {planned.field.widget_name: row[planned.column] for planned in plan.widgets}
+            PDFProcessor.fill_widgets(pdf_document, values, flatten=flatten)
+    
+    @staticmethod
+    def stamp_page(page, planned_fields: Sequence[PlannedField], row: Sequence[str]):
+        """Draw a row's values for the fields planned on one page"""
+        # Collect all text in one shape so the page content is
+        # rewritten once per page rather than once per field; text in
+        # embedded fonts goes through one writer with the parsed fonts
+        shape = page.new_shape()
+        writer = None
+        
+        for planned in planned_fields:
+            formatted, font_size = PDFGenerator._fit_field(planned, row[planned.column])
+            if not formatted:
+                continue
+            
+            font = FontRegistry.font(planned.font_name, formatted)
+            if font is None:
+                shape.insert_text((planned.x, planned.y), formatted,
+                                  fontname=planned.font_name,
+                                  fontsize=font_size,
+                                  color=(0, 0, 0))
+            else:
+                if writer is None:
+                    writer = fitz.TextWriter(page.rect)
+                writer.append((planned.x, planned.y), formatted, font=font, fontsize=font_size)
+        
+        shape.commit()
+        if writer is not None:
+            writer.write_text(page, color=(0, 0, 0))
+    
+    @staticmethod
+    def format_rows(plan: RenderPlan, df: pd.DataFrame) -> Iterator[Tuple[str, ...]]:
+        """
+        Rows of display strings for `plan`, formatted a whole column at a time
+        so no pandas objects reach the per-row rendering
+        """
+        with timer("format_rows"):
+            formatted = [TextUtils.format_column(df[col], field_type)
+                         for col, field_type in zip(plan.columns, plan.formats)]
+        if not formatted:
+            # Nothing mapped: still one (empty) row per data row
+            return iter([()] * len(df))
+        return zip(*formatted)
+    
+    @staticmethod
+    def _fit_field(planned: PlannedField, formatted: str) -> Tuple[str, float]:
+        """Fit a field's text; returns (text, font size)"""
+        field = planned.field
+        if formatted and field.max_width:
+            return TextFitter.fit(formatted, field.max_width, planned.font_name,
+                                  field.font_size, shrink=field.fit_mode == "shrink")
+        
+        return formatted, field.font_size
\ No newline at end of file
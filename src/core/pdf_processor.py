@@ -1,41 +1,145 @@
 """PDF Processing Module"""
 
-from typing import List
+from typing import Dict, List, Tuple
+import numpy as np
 from PIL import Image
-from io import BytesIO
 
-try:
-    import fitz
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
+from src.utils.metrics import timed
+from src.utils.pdf_backend import fitz, require_pymupdf
 
 
 class PDFProcessor:
     """PDF to image conversion"""
     
-    def __init__(self, dpi: int = 200):
+    # Bump when output changes, to invalidate cached results
+    VERSION = 2
+    
+    def __init__(self, dpi: int = 200, alpha: bool = False):
         self.dpi = dpi
         self.zoom = dpi / 72
+        self.alpha = alpha
         
-        if not PYMUPDF_AVAILABLE:
-            raise ImportError("PyMuPDF required. Install: pip install PyMuPDF")
+        require_pymupdf()
     
+    @timed("pdf_to_images")
     def pdf_to_images(self, pdf_bytes: bytes) -> List[Image.Image]:
         """Convert PDF to list of PIL Images"""
         try:
             images = []
             pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
-            mat = fitz.Matrix(self.zoom, self.zoom)
             
             for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("ppm")
-                img = Image.frombytes("RGB", [pix.width, pix.height], img_data)
-                images.append(img)
+                images.append(self.render_page(pdf_document, page_num))
             
             pdf_document.close()
             return images
         except Exception as e:
-            raise ValueError(f"Failed to convert PDF: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Failed to convert PDF: {str(e)}")
+    
+    @timed("render_page")
+    def render_page(self, pdf_document, page_num: int) -> Image.Image:
+        """Rasterize one page of an open PDF document"""
+        pix = self._get_pixmap(pdf_document, page_num)
+        mode = self._pil_mode(pix)
+        # Read the pixmap's samples in place: no PPM encode, no bytes copy
+        image = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv,
+                                 "raw", mode, pix.stride, 1)
+        # PIL copies RGB into its own layout; layouts it can share (RGBA, L)
+        # would still point at the pixmap's memory, so take the one copy here
+        if image.readonly:
+            image = image.copy()
+        return image
+    
+    def render_page_array(self, pdf_document, page_num: int) -> np.ndarray:
+        """Rasterize one page as a (height, width, channels) uint8 array"""
+        pix = self._get_pixmap(pdf_document, page_num)
+        rows = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+        return rows[:, :pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+    
+    def pdf_to_arrays(self, pdf_bytes: bytes) -> List[np.ndarray]:
+        """Convert PDF to list of NumPy arrays (height, width, channels)"""
+        try:
+            pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
+            arrays = [self.render_page_array(pdf_document, page_num)
+                      for page_num in range(pdf_document.page_count)]
+            pdf_document.close()
+            return arrays
+        except Exception as e:
+            raise ValueError(f"Failed to convert PDF: {str(e)}")
+    
+    def _get_pixmap(self, pdf_document, page_num: int):
+        """Render a page to an RGB pixmap, with alpha if `self.alpha`"""
+        mat = fitz.Matrix(self.zoom, self.zoom)
+        return pdf_document[page_num].get_pixmap(matrix=mat, colorspace=fitz.csRGB,
+                                                 alpha=self.alpha)
+    
+    @staticmethod
+    def _pil_mode(pix) -> str:
+        """PIL mode matching a pixmap's colorspace and alpha"""
+        modes = {(1, False): "L", (1, True): "LA",
+                 (3, False): "RGB", (3, True): "RGBA",
+                 (4, False): "CMYK"}
+        colorants = pix.n - (1 if pix.alpha else 0)
+        key = (colorants, bool(pix.alpha))
+        if key not in modes:
+            raise ValueError(f"Unsupported pixmap format: {pix.n} channels")
+        return modes[key]
+    
+    def page_pixel_size(self, page) -> Tuple[int, int]:
+        """Size in pixels a page renders to, without rendering it"""
+        rect = (page.rect * fitz.Matrix(self.zoom, self.zoom)).irect
+        return rect.width, rect.height
+    
+    @staticmethod
+    def widget_names(pdf_bytes: bytes) -> Dict[str, int]:
+        """Names of the PDF's form fields (widgets) and the page each is on"""
+        require_pymupdf()
+        
+        try:
+            pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
+        except Exception as e:
+            raise ValueError(f"Failed to open PDF: {str(e)}")
+        
+        names = {}
+        if pdf_document.is_form_pdf:
+            for page in pdf_document:
+                for widget in page.widgets():
+                    names.setdefault(widget.field_name, page.number)
+        pdf_document.close()
+        return names
+    
+    @staticmethod
+    def has_widgets(pdf_bytes: bytes) -> bool:
+        """Whether the PDF has form fields that can be filled by name"""
+        return bool(PDFProcessor.widget_names(pdf_bytes))
+    
+    @staticmethod
+    def fill_widgets(pdf_document, values: Dict[str, str], flatten: bool = False) -> int:
+        """
+        Set form fields of an open document by name; returns how many were set.
+        Checkboxes and radio buttons are switched on by any non-empty value.
+        With `flatten`, every field becomes plain page content.
+        """
+        filled = 0
+        for page in pdf_document:
+            for widget in page.widgets():
+                value = values.get(widget.field_name)
+                if value is None:
+                    continue
+                if widget.field_type in (fitz.PDF_WIDGET_TYPE_CHECKBOX, fitz.PDF_WIDGET_TYPE_RADIOBUTTON):
+                    widget.field_value = widget.on_state() if value else "Off"
+                else:
+                    widget.field_value = value
+                widget.update()
+                filled += 1
+        
+        if flatten:
+            if hasattr(pdf_document, "bake"):
+                pdf_document.bake(annots=False, widgets=True)
+            else:
+                # PyMuPDF before 1.24: keep the fields but lock them
+                for page in pdf_document:
+                    for widget in page.widgets():
+                        widget.field_flags |= fitz.PDF_FIELD_IS_READ_ONLY
+                        widget.update()
+        return filled
@@ -0,0 +1,118 @@
+"""Rendered PDF Cache Module"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+from config.settings import GenerationConfig
+from src.models.render_plan import RenderPlan
+from src.core.background_cache import BackgroundCache
+from src.core.pdf_generator import PDFGenerator
+from src.utils.font_registry import FontRegistry
+from src.utils.file_utils import FileUtils
+
+
+class RenderCache:
+    """
+    Filled PDFs on disk, keyed by a fingerprint of everything that shapes them.
+    
+    A row's fingerprint covers its mapped field values plus the batch key:
+    the render plan (template fields, positions, fonts, mapping), the font
+    files, the background PDF (and how its form fields are filled) and the
+    renderer version. Re-running a batch after fixing
+    a few rows only re-renders those rows. Least recently used files are
+    pruned as soon as a write takes the cache over `max_bytes`.
+    """
+    
+    # Pruning goes down to this fraction of max_bytes, so a full cache is
+    # not rescanned on every write
+    PRUNE_TO = 0.9
+    
+    def __init__(self, directory: Path = GenerationConfig.RENDER_CACHE_DIR,
+                 max_bytes: int = GenerationConfig.RENDER_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Bytes on disk as of the last scan plus those written since
+        self._size: Optional[int] = None
+    
+    @staticmethod
+    def batch_key(background: BackgroundCache, plan: RenderPlan) -> str:
+        """Hash of the inputs shared by every row of a batch"""
+        digest = hashlib.sha256()
+        digest.update(str(PDFGenerator.VERSION).encode())
+        digest.update(hashlib.sha256(background.base_pdf).digest())
+        digest.update(pickle.dumps(plan, protocol=4))
+        digest.update(FontRegistry.fingerprint(plan.font_names).encode())
+        if background.widgets:
+            digest.update(background.widgets.encode())
+        return digest.hexdigest()
+    
+    @staticmethod
+    def fingerprint(batch_key: str, row: Sequence[Any]) -> str:
+        """Key for one row's PDF"""
+        # Rows are tuples of display strings, so repr is stable
+        return hashlib.sha256(f"{batch_key}:{tuple(row)!r}".encode()).hexdigest()
+    
+    def contains(self, fingerprint: str) -> bool:
+        return self._path(fingerprint).exists()
+    
+    def get(self, fingerprint: str) -> Optional[bytes]:
+        """Cached PDF, or None if absent (e.g. pruned meanwhile)"""
+        path = self._path(fingerprint)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # mark recently used for pruning
+            return data
+        except FileNotFoundError:
+            return None
+    
+    def put(self, fingerprint: str, data: bytes):
+        """Store a PDF atomically, so readers never see a partial file"""
+        path = self._path(fingerprint)
+        path.parent.mkdir(exist_ok=True)
+        FileUtils.atomic_write(path, data)
+        
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._files())
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.prune(int(self.max_bytes * self.PRUNE_TO))
+    
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Delete least recently used files beyond `max_bytes` (default: the
+        cache's own); returns count removed
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+    
+    def _files(self) -> List[Tuple[float, int, Path]]:
+        """(mtime, size, path) of every cached PDF"""
+        files = []
+        for path in self.directory.glob("*/*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+    
+    def _path(self, fingerprint: str) -> Path:
+        # Two-level layout keeps directories small
+        return self.directory / fingerprint[:2] / f"{fingerprint}.pdf"
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""Address Parsing Module"""
+
+import re
+import pandas as pd
+
+from src.utils.text_utils import TextUtils
+
+
+class AddressParser:
+    """
+    Split Malaysian addresses into address lines, postcode, city and state.
+    
+    One precompiled pattern does the whole split in a single pass per address:
+    
+        <address line> <5-digit postcode> <city> <state> <tail>
+    
+    The address line is everything before the first postcode. The state is the
+    last state name after the postcode, so a city named after its state
+    ("JOHOR BAHRU JOHOR") keeps its full name.
+    """
+    
+    STATES = [
+        "JOHOR",
+        "KEDAH",
+        "KELANTAN",
+        "MELAKA",
+        "NEGERI SEMBILAN",
+        "PAHANG",
+        "PULAU PINANG",
+        "PERAK",
+        "PERLIS",
+        "SABAH",
+        "SARAWAK",
+        "SELANGOR",
+        "TERENGGANU",
+        "WILAYAH PERSEKUTUAN KUALA LUMPUR",
+        "WILAYAH PERSEKUTUAN PUTRAJAYA",
+        "WILAYAH PERSEKUTUAN LABUAN",
+        "FEDERAL TERRITORY OF LABUAN"
+    ]
+    
+    # Short forms printed on the form
+    STATE_ABBREVIATIONS = {
+        state: state.replace("WILAYAH PERSEKUTUAN", "W.P.").replace("FEDERAL TERRITORY OF", "F.T.")
+        for state in STATES
+    }
+    
+    PATTERN = re.compile(
+        r'^(?P<line>.*?)\b(?P<postcode>\d{5})\b'
+        r'(?:(?P<city>.*)\b(?P<state>'
+        + '|'.join(re.escape(state) for state in sorted(STATES, key=len, reverse=True))
+        + r')\b)?(?P<tail>.*)$',
+        # Cells may break the address over several lines
+        re.DOTALL
+    )
+    
+    # Address lines are split in two to fit the form
+    LINE_MAX_LEN = 62
+    
+    PARTS = ['address_1', 'address_2', 'postcode', 'city', 'state']
+    
+    @staticmethod
+    def parse(addresses: pd.Series) -> pd.DataFrame:
+        """
+        Parse a column of addresses.
+        Returns a frame with PARTS columns; rows without a postcode get no
+        postcode, city or state.
+        """
+        match = addresses.str.extract(AddressParser.PATTERN)
+        
+        line = AddressParser._join_lines(match['line']).str.strip()
+        address_1, address_2 = TextUtils.split_column(
+            line.str.upper(), separator=',', max_len=AddressParser.LINE_MAX_LEN
+        )
+        # Anything after the state (e.g. a full stop) stays with the city
+        city = AddressParser._join_lines(match['city'].fillna('') + match['tail'])
+        
+        return pd.DataFrame({
+            'address_1': address_1.str.strip().str.replace('  ', ', ', regex=False),
+            'address_2': address_2.str.strip().str.replace('  ', ', ', regex=False),
+            'postcode': match['postcode'],
+            'city': city.str.strip(),
+            'state': match['state'].map(AddressParser.STATE_ABBREVIATIONS)
+        }, index=addresses.index)
+    
+    @staticmethod
+    def _join_lines(values: pd.Series) -> pd.Series:
+        """Line breaks (and the spaces around them) replaced by one space"""
+        return values.str.replace(r'[ \t]*[\r\n]+\s*', ' ', regex=True)
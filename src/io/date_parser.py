@@ -0,0 +1,123 @@
+"""Date Parsing Module"""
+
+import datetime
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from config.settings import SpreadsheetConfig
+
+
+class DateParser:
+    """
+    Parse date columns with explicit formats, one vectorized pass per format.
+    
+    Malaysian dates are day-first, so only day-first (and ISO) formats are
+    candidates: 03/05/2020 is always 3 May, never 5 March. A sample of each
+    column picks the order formats are tried in; usually the first format
+    parses every row. Values no format matches are reported, not guessed.
+    """
+    
+    # Day-first and ISO formats only, most common first
+    FORMATS = [
+        '%d/%m/%Y',
+        '%d-%m-%Y',
+        '%d.%m.%Y',
+        '%Y-%m-%d',
+        '%Y-%m-%d %H:%M:%S',
+        '%d/%m/%y',
+        '%d-%m-%y',
+        '%d %b %Y',
+        '%d %B %Y',
+        '%d-%b-%Y',
+    ]
+    
+    # Examples listed when rows do not match
+    MAX_REPORTED = 5
+    
+    @staticmethod
+    def infer_formats(values: pd.Series,
+                      formats: Sequence[str] = FORMATS,
+                      sample_size: int = SpreadsheetConfig.DATE_SAMPLE_SIZE) -> List[str]:
+        """Formats that parse any of a sample of `values`, best first"""
+        sample = values.dropna().drop_duplicates()
+        if len(sample) > sample_size:
+            sample = sample.sample(n=sample_size, random_state=0)
+        
+        scores = {fmt: int(pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+                  for fmt in formats}
+        # sorted() is stable, so ties keep the preferred order
+        return [fmt for fmt in sorted(formats, key=lambda fmt: -scores[fmt]) if scores[fmt]]
+    
+    @staticmethod
+    def parse(values: pd.Series, label: Optional[str] = None,
+              formats: Sequence[str] = FORMATS) -> pd.Series:
+        """
+        Parse a column of dates; blanks become NaT.
+        Cells that already hold dates (e.g. from Excel) are kept. Raises
+        ValueError listing the spreadsheet rows whose text no format matches.
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        
+        if values.dtype == object:
+            is_date = values.map(lambda v: isinstance(v, (datetime.date, np.datetime64)))
+            is_text = values.map(lambda v: isinstance(v, str))
+        else:
+            is_date = pd.Series(False, index=values.index)
+            is_text = values.notna()
+        
+        result = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+        if is_date.any():
+            result[is_date] = pd.to_datetime(values[is_date])
+        
+        # Excel and operators leave stray (non-breaking) spaces around dates
+        text = values[is_text].astype(str).str.strip()
+        text = text[text != '']
+        remaining = text
+        for fmt in DateParser.infer_formats(text, formats):
+            parsed = pd.to_datetime(remaining, format=fmt, errors='coerce')
+            matched = parsed.notna()
+            result.loc[parsed.index[matched]] = parsed[matched]
+            remaining = remaining[~matched]
+            if remaining.empty:
+                break
+        
+        unmatched = remaining.index.union(values.index[values.notna() & ~is_date & ~is_text])
+        if len(unmatched):
+            DateParser._report(values, unmatched, label or values.name)
+        return result
+    
+    @staticmethod
+    def _report(values: pd.Series, unmatched: pd.Index, label):
+        """Raise a ValueError naming the rows that are not dates"""
+        shown = unmatched[:DateParser.MAX_REPORTED]
+        # The index counts data rows from 0; the sheet has a header row first
+        examples = ", ".join(f"row {index + 2}: {values[index]!r}" for index in shown)
+        more = f" and {len(unmatched) - len(shown)} more" if len(unmatched) > len(shown) else ""
+        raise ValueError(f"Unrecognised dates in {label} ({examples}{more}); "
+                         f"expected day-first dates such as 31/12/2024")
+    
+    @staticmethod
+    def spaced_parts(dates: pd.Series, year_width: int = 4) -> Tuple[pd.Series, pd.Series, pd.Series]:
+        """
+        Day, month and year of a datetime column, zero-padded (day and month
+        to 2 digits, year to `year_width`) with the digits spaced out to fill
+        the form's boxes. Missing dates give empty strings.
+        """
+        missing = dates.isna().to_numpy()
+        parts = []
+        for values, width, separator in [(dates.dt.day, 2, '  '),
+                                         (dates.dt.month, 2, '  '),
+                                         (dates.dt.year, year_width, '   ')]:
+            numbers = values.fillna(0).to_numpy(dtype=np.int64)
+            spaced = DateParser._spaced_table(width, separator)[numbers]
+            parts.append(pd.Series(np.where(missing, '', spaced), index=dates.index, dtype=object))
+        return tuple(parts)
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _spaced_table(width: int, separator: str) -> np.ndarray:
+        """Spaced-out digits of every number 0-9999, indexed by the number"""
+        return np.array([separator.join(str(n).zfill(width)) for n in range(10000)], dtype=object)
@@ -1,13 +1,59 @@
 """Spreadsheet Processing Module"""
 
+from itertools import islice
 import pandas as pd
-import re
-from typing import Optional
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from config.settings import SpreadsheetConfig
+from src.io.column_rules import ColumnGraph, ColumnRule
+from src.utils.text_utils import TextUtils
+from src.io.address_parser import AddressParser
+from src.io.date_parser import DateParser
+from src.utils.metrics import timed
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
 
 
 class SpreadsheetProcessor:
     """Process spreadsheet files"""
     
+    # Bump when output changes, to invalidate cached results
+    VERSION = 5
+    
+    # Address columns split into address lines, postcode, city and state
+    ADDRESS_COLUMNS = ['A2', 'C1']
+    
+    A7_COLUMN = 'A7 (Commencement Date / Incorporation Date)'
+    
+    # Raw columns whose value is taken from the file's first row for every row
+    FIRST_ROW_COLUMNS = ['Tahun Taksiran']
+    
+    # Columns of a processed frame, in order
+    OUTPUT_COLUMNS = [
+        'year_1', 'year_2', 'year_3', 'year_4',
+        'A1_1', 'A1_2',
+        'A2_address_1', 'A2_address_2', 'A2_postcode', 'A2_city', 'A2_state',
+        'A3', 'A4', 'A5', 'A6',
+        'A7_day', 'A7_month', 'A7_year',
+        'A8', 'A9',
+        'A10_from_day', 'A10_from_month', 'A10_from_year',
+        'A10_to_day', 'A10_to_month', 'A10_to_year',
+        'A11_from_day', 'A11_from_month', 'A11_from_year',
+        'A11_to_day', 'A11_to_month', 'A11_to_year',
+        'A12', 'A13', 'A14', 'A15', 'A16', 'A17', 'A18', 'A19', 'A20',
+        'C1_address_1', 'C1_address_2', 'C1_postcode', 'C1_city', 'C1_state', 'C1_country',
+        'C2',
+        'C6a',
+        'C6b = B5',
+        'C7a', 'C7b',
+        'C8a', 'C8b',
+        'C10', 'C11', 'C12',
+        'D1', 'D2', 'D3', 'D4'
+    ]
+    
     @staticmethod
     def load_file(file) -> Optional[pd.DataFrame]:
         """Load spreadsheet from file"""
@@ -19,219 +65,188 @@ class SpreadsheetProcessor:
         except Exception as e:
             raise ValueError(f"Error loading spreadsheet: {str(e)}")
     
-    
     @staticmethod
-    def split_string(text, separator=' ', max_len=50) -> list[str]:
-        words = text.split(separator)
-        parts = []
-        current = ""
-
-        for word in words:
-            # If adding this word exceeds limit, push current and start new chunk
-            if len(current) + len(word) + (1 if current else 0) > max_len:
-                parts.append(current)
-                current = word
+    def read_chunks(file, chunk_size: int = SpreadsheetConfig.CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Read a spreadsheet `chunk_size` rows at a time.
+        CSV is read with pandas' chunked reader and .xlsx row by row with
+        openpyxl's read-only mode, so no full cell model is ever built.
+        Chunks keep a running index; fully empty .xlsx rows are skipped.
+        """
+        chunk_size = max(1, chunk_size)
+        name = getattr(file, 'name', str(file))
+        try:
+            if name.endswith('.csv'):
+                yield from pd.read_csv(file, chunksize=chunk_size)
+            elif name.endswith('.xls') or not OPENPYXL_AVAILABLE:
+                # Old binary workbooks cannot be streamed
+                df = pd.read_excel(file)
+                for start in range(0, len(df), chunk_size):
+                    yield df.iloc[start:start + chunk_size]
             else:
-                current = word if not current else current + " " + word
-
-        # Append last part if non-empty
-        if current:
-            parts.append(current)
-
-        return parts
+                yield from SpreadsheetProcessor._read_xlsx_chunks(file, chunk_size)
+        except Exception as e:
+            raise ValueError(f"Error loading spreadsheet: {str(e)}")
     
-
-    # Extract state from the 'Correspondence address' column using malaysia_states list
     @staticmethod
-    def extract_state(address) -> Optional[str]:
-        """Extract state from address"""
-
-        malaysia_states = [
-            "JOHOR",
-            "KEDAH",
-            "KELANTAN",
-            "MELAKA",
-            "NEGERI SEMBILAN",
-            "PAHANG",
-            "PULAU PINANG",
-            "PERAK",
-            "PERLIS",
-            "SABAH",
-            "SARAWAK",
-            "SELANGOR",
-            "TERENGGANU",
-            "WILAYAH PERSEKUTUAN KUALA LUMPUR",
-            "WILAYAH PERSEKUTUAN PUTRAJAYA",
-            "WILAYAH PERSEKUTUAN LABUAN",
-            "FEDERAL TERRITORY OF LABUAN"
-        ]
-
-        for state in malaysia_states:
-            if state in address:
-                return state
-        return None
+    def _read_xlsx_chunks(file, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """First worksheet of an .xlsx file, streamed in chunks"""
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            # Trailing header cells without a name are unused columns
+            width = len(header)
+            while width and header[width - 1] is None:
+                width -= 1
+            columns = [f"Unnamed: {i}" if value is None else str(value)
+                       for i, value in enumerate(header[:width])]
+            
+            # Rows are padded: sheets with stale dimensions can yield short ones
+            padding = (None,) * width
+            values = ((row + padding)[:width] for row in rows
+                      if any(v is not None for v in row[:width]))
+            start = 0
+            while True:
+                records = list(islice(values, chunk_size))
+                if not records:
+                    break
+                chunk = pd.DataFrame.from_records(records, columns=columns,
+                                                  index=pd.RangeIndex(start, start + len(records)))
+                start += len(records)
+                chunk = chunk.infer_objects()
+                # Blank columns come out as NaN floats, as from pd.read_excel
+                blank = chunk.columns[chunk.isna().all()]
+                if len(blank):
+                    chunk[blank] = chunk[blank].astype(float)
+                yield chunk
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def process_chunks(chunks: Iterable[pd.DataFrame],
+                       columns: Optional[Sequence[str]] = None) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Process chunks from `read_chunks` as they arrive; yields (loaded, processed) pairs"""
+        first_row = None
+        for chunk in chunks:
+            processed = SpreadsheetProcessor.process_file(chunk, columns, first_row)
+            if first_row is None:
+                first_row = chunk.iloc[:1]
+            yield chunk, processed
     
     @staticmethod
-    # Extract city by removing address_line, postcode, and state from the full address
-    def extract_city(row, full_address: str, address_line: str, postcode: str, state: str) -> Optional[str]:
-        address = row[full_address]
-        address_line = row[address_line]
-        postcode = row[postcode]
-        state = row[state]
+    def split_string(text, separator=' ', max_len=50) -> list[str]:
+        return TextUtils.split_string(text, separator, max_len)
+    
+    @staticmethod
+    @timed("process_file")
+    def process_file(df: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                     first_row: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Process spreadsheet data into OUTPUT_COLUMNS.
+        With `columns` (e.g. the mapped ones), only those are derived and
+        returned, and only the raw columns they need must be present.
+        When `df` is a later chunk of a file, `first_row` is the file's first
+        row, which FIRST_ROW_COLUMNS are then read from.
+        """
+        if columns is None:
+            columns = SpreadsheetProcessor.OUTPUT_COLUMNS
+        else:
+            unknown = [col for col in columns if col not in SpreadsheetProcessor.OUTPUT_COLUMNS]
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+            # Keep the usual column order
+            wanted = set(columns)
+            columns = [col for col in SpreadsheetProcessor.OUTPUT_COLUMNS if col in wanted]
+        
+        # Remove leading/trailing whitespace and newline characters from all column names
+        df.columns = df.columns.str.strip().str.replace('\n', ' ')
         
-        return address.replace(address_line, '').replace(postcode, '').replace(state, '').strip()
+        if first_row is not None:
+            shared = [col for col in SpreadsheetProcessor.FIRST_ROW_COLUMNS
+                      if col in df.columns and col in first_row.columns]
+            df = df.assign(**{col: first_row[col].iloc[0] for col in shared})
+        
+        return SpreadsheetProcessor.COLUMN_GRAPH.evaluate(df, columns)
     
-
     @staticmethod
-    def process_file(df: pd.DataFrame) -> pd.DataFrame:
-        """Process spreadsheet data"""
-
-        # Remove leading/trailing whitespace from all column names
-        df.columns = df.columns.str.strip()
-
+    def column_rules() -> List[ColumnRule]:
+        """How each derived column is computed, and from which columns"""
+        rules = []
+        
         ######################################
         # PART A: BASIC PARTICULARS
         ######################################
-
-        df['year_1'] = df['Tahun Taksiran'].astype(str)[0][0]
-        df['year_2'] = df['Tahun Taksiran'].astype(str)[0][1]
-        df['year_3'] = df['Tahun Taksiran'].astype(str)[0][2]
-        df['year_4'] = df['Tahun Taksiran'].astype(str)[0][3]
-
+        
+        # Digits of the assessment year, taken from the file's first row (FIRST_ROW_COLUMNS)
+        rules.append(ColumnRule(
+            ('year_1', 'year_2', 'year_3', 'year_4'), ('Tahun Taksiran',),
+            lambda years: tuple(years.astype(str).iloc[0][:4])
+        ))
+        
         # Split employer name if exceeds 50 characters
-        df.loc[:, 'employer_name_split'] = df.loc[:, 'A1'].str.upper().apply(lambda x: SpreadsheetProcessor.split_string(x, max_len=52))
-
-        # Create new columns for split employer names
-        df.loc[:, 'A1_1'] = df['employer_name_split'].apply(lambda x: x[0])
-        df.loc[:, 'A1_2'] = df['employer_name_split'].apply(lambda x: x[1] if len(x) > 1 else '')
-
-        # Extract address line before the 5-digit postcode
-        df['A2_address_line'] = df['A2'].str.extract(r'^(.*?)(?=\b\d{5}\b)', expand=False).str.strip()
-
-        # Split address if exceeds 62 characters
-        df.loc[:, 'A2_address_line_split'] = df.loc[:, 'A2_address_line'].str.upper().apply(lambda x: SpreadsheetProcessor.split_string(x, separator=',', max_len=62))
-
-        # Create new columns for split addresses
-        df.loc[:, 'A2_address_1'] = df['A2_address_line_split'].apply(lambda x: x[0].strip().replace('  ', ', '))
-        df.loc[:, 'A2_address_2'] = df['A2_address_line_split'].apply(lambda x: x[1].strip().replace('  ', ', ') if len(x) > 1 else '')
+        rules.append(ColumnRule(
+            ('A1_1', 'A1_2'), ('A1',),
+            lambda name: TextUtils.split_column(name.str.upper(), max_len=52)
+        ))
+        
+        # Address line, postcode, city and state for A2 and C1
+        for col in SpreadsheetProcessor.ADDRESS_COLUMNS:
+            rules.append(ColumnRule(
+                tuple(f'{col}_{part}' for part in AddressParser.PARTS), (col,),
+                lambda addresses: AddressParser.parse(addresses)[AddressParser.PARTS]
+            ))
+        
+        # Extract only digits from the TIN
+        rules.append(ColumnRule(
+            ('A3',), ('A3',),
+            lambda tin: tin.str.extract(r'(\d+)', expand=False)
+        ))
+        
+        # Day, month, year padded with leading zeros and spaced out
+        rules.append(ColumnRule(
+            ('A7_date',), (SpreadsheetProcessor.A7_COLUMN,),
+            lambda dates: DateParser.parse(dates, 'A7')
+        ))
+        rules.append(ColumnRule(
+            ('A7_day', 'A7_month', 'A7_year'), ('A7_date',),
+            lambda dates: DateParser.spaced_parts(dates, year_width=2)
+        ))
+        
+        for col in ['A10', 'A11']:
+            # Split into 'from' and 'to' dates
+            rules.append(ColumnRule(
+                (f'{col}_from', f'{col}_to'), (col,),
+                lambda period: period.str.split(' hingga ', n=1, expand=True).reindex(columns=[0, 1])
+            ))
+            
+            # Day, month, year for each end of the period
+            for end in ['from', 'to']:
+                rules.append(ColumnRule(
+                    (f'{col}_{end}_date',), (f'{col}_{end}',),
+                    lambda dates, label=f'{col} ({end})': DateParser.parse(dates, label)
+                ))
+                rules.append(ColumnRule(
+                    (f'{col}_{end}_day', f'{col}_{end}_month', f'{col}_{end}_year'), (f'{col}_{end}_date',),
+                    lambda dates: DateParser.spaced_parts(dates, year_width=4)
+                ))
         
-        # Extract 5-digit postcode
-        df['A2_postcode'] = df['A2'].str.extract(r'(\b\d{5}\b)', expand=False)
-
-        # Extract state from the 'Correspondence address' column
-        df['A2_state'] = df['A2'].apply(SpreadsheetProcessor.extract_state)
-
-        # Extract city from the address column
-        df['A2_city'] = df.apply(lambda row: SpreadsheetProcessor.extract_city(row, 'A2', 'A2_address_line', 'A2_postcode', 'A2_state'), axis=1)
-
-        # After extracting city, shorten state names
-        df['A2_state'] = df['A2_state'].replace({
-            "WILAYAH PERSEKUTUAN": "W.P.",
-            "FEDERAL TERRITORY OF": "F.T."
-        }, regex=True)
-
-        # Extract only digits from the TIN in the "A3" column
-        df.loc[:, 'A3'] = df.loc[:, 'A3'].str.extract('(\d+)', expand=False)
-
-        # Convert to datetime
-        df['A7_datetime'] = pd.to_datetime(df['A7 (Commencement Date / Incorporation Date)'], format='mixed')
-
-        # Extract day, month, year padded with leading zeros and spaced out
-        df['A7_day'] = df['A7_datetime'].dt.day.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A7_month'] = df['A7_datetime'].dt.month.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A7_year'] = df['A7_datetime'].dt.year.apply(lambda x: '   '.join(list(str(x).zfill(2))))
-
-        # Split A10 into 'from' and 'to' dates
-        df[['A10_from', 'A10_to']] = df['A10'].str.split(' hingga ', n=1, expand=True)
-        df[['A11_from', 'A11_to']] = df['A11'].str.split(' hingga ', n=1, expand=True)
-
-        # Convert A10_from and A10_to to datetime
-        df['A10_from_datetime'] = pd.to_datetime(df['A10_from'], format='%d-%m-%Y')
-        df['A10_to_datetime'] = pd.to_datetime(df['A10_to'], format='%d-%m-%Y')
-
-        # Convert A11_from and A11_to to datetime
-        df['A11_from_datetime'] = pd.to_datetime(df['A11_from'], format='%d-%m-%Y')
-        df['A11_to_datetime'] = pd.to_datetime(df['A11_to'], format='%d-%m-%Y')
-
-        # Extract day, month, year for A10_from
-        df['A10_from_day'] = df['A10_from_datetime'].dt.day.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A10_from_month'] = df['A10_from_datetime'].dt.month.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A10_from_year'] = df['A10_from_datetime'].dt.year.apply(lambda x: '   '.join(list(str(x).zfill(4))))
-
-        # Extract day, month, year for A10_to
-        df['A10_to_day'] = df['A10_to_datetime'].dt.day.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A10_to_month'] = df['A10_to_datetime'].dt.month.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A10_to_year'] = df['A10_to_datetime'].dt.year.apply(lambda x: '   '.join(list(str(x).zfill(4))))
-
-        # Extract day, month, year for A11_from
-        df['A11_from_day'] = df['A11_from_datetime'].dt.day.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A11_from_month'] = df['A11_from_datetime'].dt.month.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A11_from_year'] = df['A11_from_datetime'].dt.year.apply(lambda x: '   '.join(list(str(x).zfill(4))))
-
-        # Extract day, month, year for A11_to
-        df['A11_to_day'] = df['A11_to_datetime'].dt.day.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A11_to_month'] = df['A11_to_datetime'].dt.month.apply(lambda x: '  '.join(list(str(x).zfill(2))))
-        df['A11_to_year'] = df['A11_to_datetime'].dt.year.apply(lambda x: '   '.join(list(str(x).zfill(4))))
-
         # Ensure 4 decimal places for A14
-        df['A14'] = df['A14'].apply(lambda x: '{:.4f}'.format(x) if pd.notnull(x) else x)
-
-
+        rules.append(ColumnRule(
+            ('A14',), ('A14',),
+            lambda rate: rate.map('{:.4f}'.format, na_action='ignore')
+        ))
+        
         ######################################
         # PART C: PARTICULARS OF LABUAN ENTITY
         ######################################
-
-        # Extract address line before the 5-digit postcode
-        df['C1_address_line'] = df['C1'].str.extract(r'^(.*?)(?=\b\d{5}\b)', expand=False).str.strip()
-
-        # Split address if exceeds 62 characters
-        df.loc[:, 'C1_address_line_split'] = df.loc[:, 'C1_address_line'].str.upper().apply(lambda x: SpreadsheetProcessor.split_string(x, separator=',', max_len=62))
-
-        # Create new columns for split addresses
-        df.loc[:, 'C1_address_1'] = df['C1_address_line_split'].apply(lambda x: x[0].strip().replace('  ', ', '))
-        df.loc[:, 'C1_address_2'] = df['C1_address_line_split'].apply(lambda x: x[1].strip().replace('  ', ', ') if len(x) > 1 else '')
         
-        # Extract 5-digit postcode
-        df['C1_postcode'] = df['C1'].str.extract(r'(\b\d{5}\b)', expand=False)
-
-        # Extract state from the address column
-        df['C1_state'] = df['C1'].apply(SpreadsheetProcessor.extract_state)
-
-         # Extract city from the address column
-        df['C1_city'] = df.apply(lambda row: SpreadsheetProcessor.extract_city(row, 'C1', 'C1_address_line', 'C1_postcode', 'C1_state'), axis=1)
-
-        # After extracting city, shorten state names
-        df['C1_state'] = df['C1_state'].replace({
-            "WILAYAH PERSEKUTUAN": "W.P.",
-            "FEDERAL TERRITORY OF": "F.T."
-        }, regex=True)
-
-        df['C1_country'] = 'MALAYSIA'
-
-        # Rename (remove newline characters)
-        df.columns = df.columns.str.replace('\n', ' ')
+        rules.append(ColumnRule(('C1_country',), (), lambda: 'MALAYSIA'))
+        
+        return rules
 
-        # Subset relevant columns only
-        df = df[[
-            'year_1', 'year_2', 'year_3', 'year_4',
-            'A1_1', 'A1_2',
-            'A2_address_1', 'A2_address_2', 'A2_postcode', 'A2_city', 'A2_state',
-            'A3', 'A4', 'A5', 'A6',
-            'A7_day', 'A7_month', 'A7_year',
-            'A8', 'A9',
-            'A10_from_day', 'A10_from_month', 'A10_from_year',
-            'A10_to_day', 'A10_to_month', 'A10_to_year',
-            'A11_from_day', 'A11_from_month', 'A11_from_year',
-            'A11_to_day', 'A11_to_month', 'A11_to_year',
-            'A12', 'A13', 'A14', 'A15', 'A16', 'A17', 'A18', 'A19', 'A20',
-            'C1_address_1', 'C1_address_2', 'C1_postcode', 'C1_city', 'C1_state', 'C1_country',
-            'C2',
-            'C6a',
-            'C6b = B5',
-            'C7a', 'C7b',
-            'C8a', 'C8b',
-            'C10', 'C11', 'C12',
-            'D1', 'D2', 'D3', 'D4'
-        ]]
 
-        return df
\ No newline at end of file
+# Built once the class exists, as the rules call its helpers
+SpreadsheetProcessor.COLUMN_GRAPH = ColumnGraph(SpreadsheetProcessor.column_rules())
\ No newline at end of file
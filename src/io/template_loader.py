@@ -1,40 +1,163 @@
 """Template Loading Module"""
 
+import hashlib
+import json
+import pickle
+import sys
+from io import BytesIO
+from pathlib import Path
 import pandas as pd
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from src.models.form_template import FormTemplate, FieldDefinition
 from src.models.field_definition import FieldType
+from src.utils.file_utils import FileUtils
+from config.settings import FieldConfig, CacheConfig
 
 class TemplateLoader:
     """Load templates from CSV"""
     
+    # Bump when output changes, to invalidate cached results
+    VERSION = 4
+    
     @staticmethod
-    def from_csv(csv_file) -> Optional[FormTemplate]:
-        """Load template from CSV file"""
+    def from_csv(csv_file, cache: bool = CacheConfig.TEMPLATE_CACHE) -> Optional[FormTemplate]:
+        """
+        Load template from CSV file (a path or a file object).
+        With `cache`, the compiled columns are kept on disk keyed by a hash
+        of the CSV, so loading the same template again skips parsing entirely.
+        """
         try:
-            df = pd.read_csv(csv_file)
+            if hasattr(csv_file, 'read'):
+                data = csv_file.read()
+            else:
+                data = Path(csv_file).read_bytes()
+            if isinstance(data, str):
+                data = data.encode('utf-8')
             
-            # Check for required columns
-            required_columns = ['field_name', 'page_number', 'x', 'y']
-            missing = [col for col in required_columns if col not in df.columns]
+            if not cache:
+                return TemplateLoader.build(TemplateLoader.compile_csv(data))
             
-            if missing:
-                raise ValueError(f"Missing columns: {', '.join(missing)}")
+            digest = hashlib.sha256(f"{TemplateLoader.VERSION}:".encode() + data).hexdigest()
+            path = Path(CacheConfig.TEMPLATE_CACHE_DIR) / f"{digest}.pkl"
+            columns = TemplateLoader._read_cached(path)
+            if columns is None:
+                columns = TemplateLoader.compile_csv(data)
+                TemplateLoader._write_cached(path, columns)
+            return TemplateLoader.build(columns)
+        except Exception as e:
+            raise ValueError(f"Error loading template: {str(e)}")
+    
+    @staticmethod
+    def compile_csv(data: bytes) -> Tuple[list, ...]:
+        """
+        Parse and validate template CSV content, a whole column at a time.
+        Returns one list per FieldDefinition attribute, in declaration order,
+        with field types as their values and font names interned.
+        """
+        df = pd.read_csv(BytesIO(data))
+        
+        # Check for required columns; x/y may be replaced by widget_name
+        required_columns = ['field_name', 'page_number']
+        if 'widget_name' not in df.columns:
+            required_columns += ['x', 'y']
+        missing = [col for col in required_columns if col not in df.columns]
+        
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        
+        def column(name: str, default=None) -> pd.Series:
+            """A CSV column, or `default` for every row if it is absent"""
+            if name in df.columns:
+                return df[name] if default is None else df[name].fillna(default)
+            return pd.Series(default, index=df.index, dtype=object)
+        
+        def optional(values: pd.Series) -> list:
+            """Column values as a list, with None for blanks"""
+            return values.astype(object).where(values.notna(), None).tolist()
+        
+        names = df['field_name'].astype(str)
+        pages = pd.to_numeric(df['page_number']).astype(int)
+        x = pd.to_numeric(column('x')).astype(float)
+        y = pd.to_numeric(column('y')).astype(float)
+        has_position = x.notna() & y.notna()
+        x, y = x.where(has_position), y.where(has_position)
+        widgets = column('widget_name')
+        widgets = widgets.where(widgets.isna(), widgets.astype(str))
+        
+        field_types = column('field_type', FieldType.TEXT.value).astype(str)
+        invalid = ~field_types.isin([ft.value for ft in FieldType])
+        if invalid.any():
+            raise ValueError(f"'{field_types[invalid].iloc[0]}' is not a valid FieldType")
+        
+        fit_modes = column('fit_mode', 'truncate').astype(str)
+        invalid = ~fit_modes.isin(FieldConfig.FIT_MODES)
+        if invalid.any():
+            raise ValueError(f"Unknown fit_mode '{fit_modes[invalid].iloc[0]}' for {names[invalid].iloc[0]}")
+        
+        unplaced = ~has_position & widgets.isna()
+        if unplaced.any():
+            raise ValueError(f"{names[unplaced].iloc[0]} needs x and y or a widget_name")
+        
+        font_sizes = pd.to_numeric(column('font_size', FieldConfig.DEFAULT_FONT_SIZE)).astype(int)
+        max_widths = pd.to_numeric(column('max_width'))
+        max_widths = max_widths.astype(object).where(max_widths.isna(), max_widths.fillna(0).astype(int))
+        
+        # Each distinct font name is one shared string
+        codes, font_table = pd.factorize(column('font_name', FieldConfig.DEFAULT_FONT_NAME).astype(str))
+        font_table = [sys.intern(name) for name in font_table]
+        
+        return (names.tolist(), pages.tolist(), optional(x), optional(y),
+                field_types.tolist(), font_sizes.tolist(),
+                [font_table[code] for code in codes], optional(max_widths),
+                fit_modes.tolist(), optional(widgets))
+    
+    @staticmethod
+    def build(columns: Tuple[list, ...]) -> FormTemplate:
+        """Template from the columns of `compile_csv`"""
+        names, pages, x, y, field_types, *rest = columns
+        types = {ft.value: ft for ft in FieldType}
+        return FormTemplate(fields=[FieldDefinition(*values)
+                                    for values in zip(names, pages, x, y,
+                                                      [types[value] for value in field_types], *rest)])
+    
+    @staticmethod
+    def _read_cached(path: Path) -> Optional[Tuple[list, ...]]:
+        """Columns compiled by an earlier load, or None"""
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Unreadable (e.g. written by an older version): parse again
+            path.unlink(missing_ok=True)
+            return None
+    
+    @staticmethod
+    def _write_cached(path: Path, columns: Tuple[list, ...]):
+        """Store compiled columns atomically, so readers never see a partial file"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        FileUtils.atomic_write(path, pickle.dumps(columns, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    @staticmethod
+    def load_mapping(mapping_file) -> Dict[str, str]:
+        """
+        Load a column-to-field mapping.
+        JSON: {"column": "field", ...}; CSV: columns `column` and `field`
+        """
+        try:
+            name = getattr(mapping_file, 'name', str(mapping_file))
             
-            fields = []
-            for _, row in df.iterrows():
-                field = FieldDefinition(
-                    field_name=row['field_name'],
-                    page_number=int(row['page_number']),
-                    x=float(row['x']),
-                    y=float(row['y']),
-                    field_type=FieldType(row.get('field_type', 'text')),
-                    font_size=int(row.get('font_size', 9)),
-                    font_name=row.get('font_name', 'Helvetica'),
-                    max_width=int(row['max_width']) if pd.notna(row.get('max_width')) else None
-                )
-                fields.append(field)
+            if name.endswith('.json'):
+                if hasattr(mapping_file, 'read'):
+                    mapping = json.load(mapping_file)
+                else:
+                    with open(mapping_file, encoding='utf-8') as f:
+                        mapping = json.load(f)
+            else:
+                df = pd.read_csv(mapping_file, dtype=str)
+                mapping = dict(zip(df['column'], df['field']))
             
-            return FormTemplate(fields=fields)
+            return {str(col): str(field) for col, field in mapping.items() if field}
         except Exception as e:
-            raise ValueError(f"Error loading template: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Error loading mapping: {str(e)}")
\ No newline at end of file
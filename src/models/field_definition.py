@@ -13,17 +13,23 @@ class FieldType(Enum):
     CHECKBOX = "checkbox"
 
 
-@dataclass
+@dataclass(slots=True)
 class FieldDefinition:
-    """Represents a field in a form template"""
+    """Represents a field in a form template (slotted: templates hold thousands)"""
     field_name: str
     page_number: int
-    x: float
-    y: float
+    x: Optional[float]   # None for fields filled through `widget_name` only
+    y: Optional[float]
     field_type: FieldType = FieldType.TEXT
     font_size: int = 10
     font_name: str = "Helvetica"
     max_width: Optional[int] = None
+    fit_mode: str = "truncate"   # or "shrink", when max_width is set
+    widget_name: Optional[str] = None   # PDF form field to fill instead of drawing at x/y
+    
+    @property
+    def has_position(self) -> bool:
+        return self.x is not None and self.y is not None
     
     def to_dict(self) -> dict:
         """Convert to dictionary"""
@@ -37,10 +43,12 @@ class FieldDefinition:
         return cls(
             field_name=data['field_name'],
             page_number=int(data['page_number']),
-            x=float(data['x']),
-            y=float(data['y']),
+            x=float(data['x']) if data.get('x') is not None else None,
+            y=float(data['y']) if data.get('y') is not None else None,
             field_type=FieldType(data.get('field_type', 'text')),
             font_size=int(data.get('font_size', 10)),
             font_name=data.get('font_name', 'Helvetica'),
-            max_width=int(data['max_width']) if data.get('max_width') else None
+            max_width=int(data['max_width']) if data.get('max_width') else None,
+            fit_mode=data.get('fit_mode') or 'truncate',
+            widget_name=data.get('widget_name') or None
         )
\ No newline at end of file
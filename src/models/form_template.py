@@ -1,8 +1,11 @@
 """Form Template Data Model"""
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Any
-from .field_definition import FieldDefinition
+from typing import List, Dict, Any, Optional, Sequence, Set
+from .field_definition import FieldDefinition, FieldType
+from .render_plan import PlannedField, PlannedWidget, RenderPlan
+from src.core.coordinate_utils import CoordinateUtils
+from src.utils.font_registry import FontRegistry
 
 
 @dataclass
@@ -11,15 +14,89 @@ class FormTemplate:
     fields: List[FieldDefinition]
     template_name: str = "template"
     metadata: Dict[str, Any] = field(default_factory=dict)
+    _page_index: Optional[Dict[int, List[FieldDefinition]]] = field(
+        default=None, init=False, repr=False, compare=False)
+    _plans: Dict[tuple, RenderPlan] = field(
+        default_factory=dict, init=False, repr=False, compare=False)
     
     def get_fields_by_page(self, page_number: int) -> List[FieldDefinition]:
         """Get all fields for a specific page"""
-        return [f for f in self.fields if f.page_number == page_number]
+        if self._page_index is None:
+            self._page_index = {}
+            for f in self.fields:
+                self._page_index.setdefault(f.page_number, []).append(f)
+        return self._page_index.get(page_number, [])
+    
+    def get_page_numbers(self) -> Set[int]:
+        """Get the pages that have at least one field"""
+        return {f.page_number for f in self.fields}
     
     def get_field_names(self) -> List[str]:
         """Get list of all field names"""
         return [f.field_name for f in self.fields]
     
+    def compile_plan(self, geometry: Sequence, mapping: Dict[str, str],
+                     widgets: bool = False) -> RenderPlan:
+        """
+        Resolve everything about drawing that does not change between rows.
+        `geometry` has one PageGeometry per output page and `mapping` maps data
+        columns to field names. Only mapped fields are planned; plans are
+        cached per page layout and mapping.
+        With `widgets`, fields that name a widget are filled through it;
+        otherwise they are drawn at x/y, and skipped if they have none.
+        """
+        key = (tuple((g.page_width, g.page_height, g.image_height, g.drawn_height,
+                      g.x_offset, g.y_offset, g.page_number) for g in geometry),
+               tuple(mapping.items()), widgets)
+        if key in self._plans:
+            return self._plans[key]
+        
+        # Last column wins when several map to the same field
+        field_columns = {field_name: col for col, field_name in mapping.items()}
+        columns = []
+        formats = []
+        positions = {}
+        pages = []
+        planned_widgets = []
+        
+        def position(col: str, f: FieldDefinition) -> int:
+            """Slot of the column formatted as the field's type"""
+            key = (col, f.field_type.value)
+            if key not in positions:
+                positions[key] = len(columns)
+                columns.append(col)
+                formats.append(f.field_type.value)
+            return positions[key]
+        
+        if widgets:
+            for f in self.fields:
+                col = field_columns.get(f.field_name)
+                if col is not None and f.widget_name:
+                    planned_widgets.append(PlannedWidget(f, position(col, f)))
+        
+        for index, g in enumerate(geometry):
+            page_number = index if g.page_number is None else g.page_number
+            planned = []
+            for f in self.get_fields_by_page(page_number):
+                col = field_columns.get(f.field_name)
+                if col is None or (widgets and f.widget_name) or not f.has_position:
+                    continue
+                
+                x, y = CoordinateUtils.image_to_page(f.x, f.y, g.image_height, g.drawn_height)
+                font_name = f.font_name
+                if f.field_type == FieldType.CHECKBOX:
+                    font_name = FontRegistry.symbol_font(font_name)
+                planned.append(PlannedField(f, position(col, f), x + g.x_offset, y + g.y_offset,
+                                            font_name))
+            
+            # Draw fields sharing a font together
+            planned.sort(key=lambda p: (p.font_name, p.field.font_size))
+            pages.append(planned)
+        
+        plan = RenderPlan(columns, formats, pages, planned_widgets)
+        self._plans[key] = plan
+        return plan
+    
     def to_dict(self) -> dict:
         """Convert to dictionary"""
         return {
@@ -0,0 +1,41 @@
+"""Render Plan Data Model"""
+
+from dataclasses import dataclass, field
+from typing import List
+from .field_definition import FieldDefinition
+
+
+@dataclass
+class PlannedField:
+    """A mapped field with everything that does not depend on the row resolved"""
+    field: FieldDefinition
+    column: int   # position of the field's text in a data row
+    x: float      # page coordinates, top-left origin
+    y: float
+    font_name: str   # the field's font, or one that can draw its checkbox tick
+
+
+@dataclass
+class PlannedWidget:
+    """A mapped field filled through the PDF form field named `field.widget_name`"""
+    field: FieldDefinition
+    column: int   # position of the field's text in a data row
+
+
+@dataclass
+class RenderPlan:
+    """
+    Row-independent drawing instructions for one template on one page layout.
+    Data rows are sequences of display strings, one per slot: the data
+    column `columns[i]` formatted as field type `formats[i]`.
+    """
+    columns: List[str]
+    formats: List[str]
+    pages: List[List[PlannedField]]   # one list per output page, grouped by font
+    # Fields set by form field name; only planned for PDFs whose widgets are filled
+    widgets: List[PlannedWidget] = field(default_factory=list)
+    
+    @property
+    def font_names(self) -> List[str]:
+        """Fonts the drawn fields use"""
+        return sorted({planned.font_name for page in self.pages for planned in page})
@@ -0,0 +1,187 @@
+"""ZIP Archive Writer"""
+
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from typing import IO, Optional, Tuple
+
+from config.settings import ExportConfig
+from src.utils.metrics import timed
+
+
+@dataclass
+class ArchiveStats:
+    """What the archive writer did for one batch"""
+    entries: int = 0
+    stored: int = 0
+    deflated: int = 0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    compress_seconds: float = 0.0    # CPU time spent deflating, all threads
+    seconds_saved: float = 0.0       # estimated deflate time skipped by storing
+    
+    @property
+    def bytes_saved(self) -> int:
+        return self.input_bytes - self.output_bytes
+    
+    def merge(self, other: 'ArchiveStats'):
+        """Add another batch's counts, e.g. of the same archive continued"""
+        for item in fields(self):
+            setattr(self, item.name, getattr(self, item.name) + getattr(other, item.name))
+    
+    def summary(self) -> str:
+        """One-line description for logs and the UI"""
+        return (f"{self.entries} entries ({self.deflated} compressed, {self.stored} stored), "
+                f"{self.bytes_saved / 1024:,.0f} KB saved by compression in "
+                f"{self.compress_seconds:.2f}s, ~{self.seconds_saved:.2f}s saved by storing")
+
+
+class ArchiveWriter:
+    """
+    ZIP writer that picks STORED or DEFLATED per entry.
+    
+    Each entry is test-compressed on a few small samples; if deflate would
+    save less than `min_saving` of its size it is stored as-is. Entries worth
+    compressing are deflated on a thread pool (zlib releases the GIL) while
+    earlier entries are written out in order.
+    With `append`, entries are added to the existing archive in `file_obj`.
+    """
+    
+    def __init__(self,
+                 file_obj: IO[bytes],
+                 min_saving: float = ExportConfig.ZIP_MIN_SAVING,
+                 compress_level: int = ExportConfig.ZIP_COMPRESS_LEVEL,
+                 workers: int = ExportConfig.ZIP_COMPRESS_WORKERS,
+                 append: bool = False):
+        self.min_saving = min_saving
+        self.compress_level = compress_level
+        self.stats = ArchiveStats()
+        self._zip = zipfile.ZipFile(file_obj, 'a' if append else 'w', zipfile.ZIP_STORED,
+                                    allowZip64=True)
+        # Pre-compressed entries need their header rewritten in place
+        self._seekable = file_obj.seekable()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._window = max(1, workers) * 2
+        self._pending = deque()
+    
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def add(self, filename: str, data: bytes):
+        """Queue an entry; entries are written in the order they are added"""
+        self._pending.append((filename, data, self._executor.submit(self._compress, data)))
+        
+        if len(self._pending) >= self._window:
+            self._write_next()
+    
+    def close(self) -> ArchiveStats:
+        """Write remaining entries and finish the archive"""
+        try:
+            while self._pending:
+                self._write_next()
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._zip.close()
+        return self.stats
+    
+    @property
+    def entries_end(self) -> int:
+        """Offset where the entries end and the central directory starts"""
+        return self._zip.start_dir
+    
+    def _compress(self, data: bytes) -> Tuple[Optional[bytes], int, float, float]:
+        """
+        Decide how to store one entry (runs on a worker thread).
+        Returns (deflated data or None to store, crc, cpu seconds, seconds saved)
+        """
+        start = time.thread_time()
+        size = len(data)
+        sample_size = ExportConfig.ZIP_SAMPLE_SIZE
+        
+        if size > 3 * sample_size:
+            # Sample the start, middle and end; PDFs mix text and image streams
+            middle = (size - sample_size) // 2
+            samples = [data[:sample_size], data[middle:middle + sample_size], data[-sample_size:]]
+        else:
+            samples = [data]
+        
+        sampled = sum(len(s) for s in samples)
+        sampled_out = sum(len(self._deflate(s)) for s in samples)
+        crc = zlib.crc32(data)
+        
+        if sampled and 1 - sampled_out / sampled < self.min_saving:
+            elapsed = time.thread_time() - start
+            # Extrapolate what deflating the rest would have cost
+            saved = elapsed / sampled * max(0, size - sampled) if sampled else 0.0
+            return None, crc, elapsed, saved
+        
+        deflated = self._deflate(data)
+        return deflated, crc, time.thread_time() - start, 0.0
+    
+    def _deflate(self, data: bytes) -> bytes:
+        """Raw deflate stream, as stored inside a ZIP entry"""
+        compressor = zlib.compressobj(self.compress_level, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush()
+    
+    @timed("zip_entry")
+    def _write_next(self):
+        """Write the oldest queued entry"""
+        filename, data, future = self._pending.popleft()
+        deflated, crc, cpu_seconds, seconds_saved = future.result()
+        
+        if deflated is not None and len(deflated) >= len(data):
+            deflated = None
+        
+        zinfo = zipfile.ZipInfo(filename, date_time=time.localtime(time.time())[:6])
+        
+        if deflated is None:
+            zinfo.compress_type = zipfile.ZIP_STORED
+            self._zip.writestr(zinfo, data)
+            self.stats.stored += 1
+            self.stats.output_bytes += len(data)
+        elif self._seekable:
+            self._write_deflated(zinfo, data, deflated, crc)
+            self.stats.deflated += 1
+            self.stats.output_bytes += len(deflated)
+        else:
+            # Cannot patch headers on a pipe; let zipfile deflate it again
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            self._zip.writestr(zinfo, data)
+            self.stats.deflated += 1
+            self.stats.output_bytes += zinfo.compress_size
+        
+        self.stats.entries += 1
+        self.stats.input_bytes += len(data)
+        self.stats.compress_seconds += cpu_seconds
+        self.stats.seconds_saved += seconds_saved
+    
+    def _write_deflated(self, zinfo: zipfile.ZipInfo, data: bytes, deflated: bytes, crc: int):
+        """
+        Write an entry that was already deflated.
+        zipfile has no raw-write API: the payload is written as a STORED
+        entry, then the local header is rewritten with the real method,
+        CRC and size (the central directory is built from `zinfo` on close).
+        """
+        zinfo.compress_type = zipfile.ZIP_STORED
+        # zipfile sizes the header (zip64 or not) from file_size; do the same
+        zinfo.file_size = len(data)
+        zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+        
+        with self._zip.open(zinfo, 'w', force_zip64=zip64) as dest:
+            dest.write(deflated)
+        
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.file_size = len(data)
+        zinfo.CRC = crc
+        
+        fp = self._zip.fp
+        end = fp.tell()
+        fp.seek(zinfo.header_offset)
+        fp.write(zinfo.FileHeader(zip64))
+        fp.seek(end)
@@ -0,0 +1,129 @@
+"""Content-Addressed Cache Utilities"""
+
+import hashlib
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, TypeVar
+import pandas as pd
+from PIL import Image
+
+from config.settings import CacheConfig
+
+T = TypeVar('T')
+
+
+class ContentCache:
+    """
+    LRU cache for expensive results derived from uploaded files.
+    
+    Keys are built from a hash of the file content plus the parameters that
+    affect the result, so the same upload is only processed once whichever
+    session it comes from. The cache is bounded by the estimated in-memory
+    size of its values; least recently used entries are evicted first.
+    Values with a `cache_size()` method (e.g. lazy page sources, which grow
+    as pages are rendered) are re-measured whenever the cache is used.
+    """
+    
+    def __init__(self, max_bytes: int = CacheConfig.MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per key being computed, so concurrent sessions
+        # uploading the same file wait for one computation
+        self._key_locks = {}
+    
+    @staticmethod
+    def key(kind: str, content: bytes, **params) -> tuple:
+        """Cache key for a result of `kind` computed from `content` and `params`"""
+        digest = hashlib.sha256(content).hexdigest()
+        return (kind, digest, tuple(sorted(params.items())))
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+        Cached values are shared: callers must not modify them.
+        """
+        with self._lock:
+            if key in self._entries:
+                return self._hit(key)
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    return self._hit(key)
+            
+            try:
+                value = compute()
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+            size = ContentCache.estimate_size(value)
+            
+            with self._lock:
+                self.misses += 1
+                if size <= self.max_bytes:
+                    self._entries[key] = (value, size)
+                    self.current_bytes += size
+                self._refresh()
+                self._evict()
+            return value
+    
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _hit(self, key: Hashable) -> Any:
+        """Record a hit and mark the entry most recently used (lock held)"""
+        self.hits += 1
+        self._entries.move_to_end(key)
+        value = self._entries[key][0]
+        self._refresh()
+        self._evict()
+        return value
+    
+    def _refresh(self):
+        """Re-measure values whose size changes while cached (lock held)"""
+        for key, (value, size) in list(self._entries.items()):
+            if hasattr(value, 'cache_size'):
+                current = value.cache_size()
+                self._entries[key] = (value, current)
+                self.current_bytes += current - size
+    
+    def _evict(self):
+        """Evict least recently used entries until within budget (lock held)"""
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+    
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        """Approximate memory held by a cached value, in bytes"""
+        if hasattr(value, 'cache_size'):
+            return value.cache_size()
+        if isinstance(value, Image.Image):
+            return value.width * value.height * len(value.getbands())
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(deep=True).sum())
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        if isinstance(value, (list, tuple)):
+            return sum(ContentCache.estimate_size(v) for v in value)
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return sys.getsizeof(value)
+
+
+# Process-wide cache shared by all sessions
+upload_cache = ContentCache()
\ No newline at end of file
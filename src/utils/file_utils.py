@@ -1,21 +1,55 @@
 """File Utilities"""
 
+import os
+import tempfile
 from io import BytesIO
-from typing import List
-import zipfile
+from pathlib import Path
+from typing import IO, Iterable, List, Tuple
+
+from src.utils.archive_writer import ArchiveWriter, ArchiveStats
+from src.utils import metrics
 
 
 class FileUtils:
     """File operation utilities"""
     
     @staticmethod
+    def safe_filename(name, extension: str = ".pdf") -> str:
+        """Build a filename from a spreadsheet value"""
+        # Replace special characters & replace white spaces with underscores
+        name = "".join(c for c in str(name) if c.isalnum() or c in (' ', '_')).rstrip()
+        name = name.replace(" ", "_")
+        return f"{name}{extension}"
+    
+    @staticmethod
+    def atomic_write(path: Path, data: bytes):
+        """Write a file atomically, so readers never see a partial file"""
+        fd, tmp_path = tempfile.mkstemp(dir=Path(path).parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+    
+    @staticmethod
+    @metrics.timed("create_zip")
     def create_zip(pdf_files: List[BytesIO], filenames: List[str]) -> BytesIO:
         """Create zip file containing PDFs"""
         zip_buffer = BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for pdf_data, filename in zip(pdf_files, filenames):
-                zip_file.writestr(filename, pdf_data.getvalue())
-        
+        entries = ((filename, pdf_data.getvalue())
+                   for pdf_data, filename in zip(pdf_files, filenames))
+        FileUtils.write_zip(zip_buffer, entries)
         zip_buffer.seek(0)
-        return zip_buffer
\ No newline at end of file
+        return zip_buffer
+    
+    @staticmethod
+    def write_zip(file_obj: IO[bytes], entries: Iterable[Tuple[str, bytes]]) -> ArchiveStats:
+        """Write (filename, data) pairs into a zip on an open binary file"""
+        with ArchiveWriter(file_obj) as archive:
+            for filename, data in entries:
+                archive.add(filename, data)
+        
+        metrics.increment("zip_output_bytes", archive.stats.output_bytes)
+        return archive.stats
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""Font Registry Module"""
+
+import hashlib
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from config.settings import FontConfig
+from src.utils.pdf_backend import fitz, PYMUPDF_AVAILABLE
+
+try:
+    from fontTools import subset as font_subset
+    from fontTools.ttLib import TTFont
+    FONTTOOLS_AVAILABLE = True
+except ImportError:
+    FONTTOOLS_AVAILABLE = False
+
+
+@dataclass
+class LoadedFont:
+    """A font parsed once per process"""
+    full: 'fitz.Font'
+    subset: 'fitz.Font'   # `full` itself when no subset could be made
+    covered: FrozenSet[str]   # characters the subset can draw
+
+
+class FontRegistry:
+    """
+    Fonts that are embedded in output PDFs, loaded once per process.
+    
+    Each TrueType font in FontConfig.FONTS is read, parsed and cut down to
+    FontConfig.SUBSET_CHARS the first time it is used (or when warmed up),
+    so embedding it costs every PDF a small subset rather than the whole
+    font. Text with characters outside the subset is drawn with the whole
+    font. Base-14 fonts are not registered; they are drawn without
+    embedding, except those in BUILTIN, which are needed for symbols.
+    """
+    
+    # Base-14 fonts that PyMuPDF only maps Unicode text to when embedded
+    BUILTIN = {"ZapfDingbats": "zadb"}
+    
+    _fonts: Dict[str, LoadedFont] = {}
+    
+    @staticmethod
+    def path(name: str) -> Optional[Path]:
+        """File of a TrueType font from FontConfig.FONTS, or None if not found"""
+        filename = FontConfig.FONTS.get(name)
+        if filename is None:
+            return None
+        for directory in FontConfig.FONT_DIRS:
+            candidate = Path(directory) / filename
+            if candidate.is_file():
+                return candidate
+        return None
+    
+    @staticmethod
+    def is_registered(name: str) -> bool:
+        """Whether text in `name` is drawn with an embedded font"""
+        return name in FontRegistry.BUILTIN or FontRegistry.path(name) is not None
+    
+    @staticmethod
+    def symbol_font(font_name: str, symbol: str = "✓") -> str:
+        """Font to draw `symbol` (e.g. a checkbox tick) with: `font_name` if it has it"""
+        for name in [font_name, *FontConfig.SYMBOL_FONTS]:
+            font = FontRegistry.font(name)
+            if font is not None and font.has_glyph(ord(symbol)):
+                return name
+        return font_name
+    
+    @staticmethod
+    def font(name: str, text: str = "") -> Optional['fitz.Font']:
+        """
+        Parsed font to draw `text` in `name` with: the subset if it covers
+        `text`, else the whole font. None for fonts that are not registered.
+        """
+        loaded = FontRegistry._fonts.get(name)
+        if loaded is None:
+            if not PYMUPDF_AVAILABLE or not FontRegistry.is_registered(name):
+                return None
+            loaded = FontRegistry._load(name)
+        if loaded.covered.issuperset(text):
+            return loaded.subset
+        return loaded.full
+    
+    @staticmethod
+    def warm(names: Iterable[str]):
+        """Load the registered fonts among `names` now, e.g. in a new worker"""
+        for name in names:
+            FontRegistry.font(name)
+    
+    @staticmethod
+    def fingerprint(names: Iterable[str]) -> str:
+        """Hash of the font files behind `names`, to key cached output"""
+        digest = hashlib.sha256()
+        for name in sorted(set(names)):
+            path = FontRegistry.path(name)
+            if path is not None:
+                stat = path.stat()
+                digest.update(f"{name}:{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _load(name: str) -> LoadedFont:
+        """Parse a font and its subset, once per process"""
+        if name in FontRegistry.BUILTIN:
+            full = fitz.Font(FontRegistry.BUILTIN[name])
+            loaded = LoadedFont(full, full, frozenset())
+        else:
+            data = FontRegistry.path(name).read_bytes()
+            full = fitz.Font(fontbuffer=data)
+            loaded = LoadedFont(full, full, frozenset())
+            if FONTTOOLS_AVAILABLE:
+                chars = {c for c in FontConfig.SUBSET_CHARS if full.has_glyph(ord(c))}
+                subset = fitz.Font(fontbuffer=FontRegistry._subset(data, chars))
+                loaded = LoadedFont(full, subset, frozenset(chars))
+        
+        FontRegistry._fonts[name] = loaded
+        return loaded
+    
+    @staticmethod
+    def _subset(data: bytes, chars: Iterable[str]) -> bytes:
+        """TrueType font data cut down to the glyphs of `chars`"""
+        options = font_subset.Options()
+        options.layout_features = []
+        options.hinting = False
+        options.notdef_outline = True
+        # FontForge's timestamp table, which fontTools cannot subset
+        options.drop_tables += ["FFTM"]
+        font = TTFont(BytesIO(data))
+        subsetter = font_subset.Subsetter(options)
+        subsetter.populate(text="".join(chars))
+        subsetter.subset(font)
+        output = BytesIO()
+        font.save(output)
+        return output.getvalue()
@@ -0,0 +1,176 @@
+"""Timing and Counter Metrics"""
+
+import contextvars
+import functools
+import json
+import math
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, List
+
+from config.settings import MetricsConfig
+
+# Registry collecting for the current batch; None when metrics are off.
+# A context variable keeps concurrent Streamlit sessions apart.
+_active = contextvars.ContextVar("metrics_registry", default=None)
+_NULL_TIMER = nullcontext()
+
+
+class _Timer:
+    """Observations for one timer: exact count/total, sampled percentiles"""
+    
+    __slots__ = ("count", "total", "max", "samples")
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+    
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        
+        # Reservoir sampling keeps percentiles representative in bounded memory
+        if len(self.samples) < MetricsConfig.MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MetricsConfig.MAX_SAMPLES:
+                self.samples[slot] = seconds
+    
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile of the sampled observations"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class MetricsRegistry:
+    """
+    Named timers and counters for one batch.
+    
+    Instrumented code calls the module-level `timer`, `timed` and `increment`,
+    which record into the registry activated with `activate()`. With no
+    active registry they do nothing beyond one context-variable lookup.
+    """
+    
+    PERCENTILES = [50, 90, 99]
+    
+    def __init__(self):
+        self.timers: Dict[str, _Timer] = {}
+        self.counters: Dict[str, float] = {}
+    
+    @contextmanager
+    def activate(self):
+        """Record metrics from this context into the registry"""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+    
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+    
+    def observe(self, name: str, seconds: float):
+        if name not in self.timers:
+            self.timers[name] = _Timer()
+        self.timers[name].observe(seconds)
+    
+    def increment(self, name: str, value: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+    
+    def export_state(self) -> dict:
+        """Raw observations, for sending back from a worker process"""
+        return {
+            "timers": {name: (t.count, t.total, t.max, t.samples) for name, t in self.timers.items()},
+            "counters": dict(self.counters),
+        }
+    
+    def merge(self, state: dict):
+        """Add observations exported by another registry"""
+        for name, (count, total, max_seconds, samples) in state["timers"].items():
+            timer = self.timers.setdefault(name, _Timer())
+            # Samples go through the reservoir; count and total stay exact
+            for seconds in samples:
+                timer.observe(seconds)
+            timer.count += count - len(samples)
+            timer.total += total - sum(samples)
+            timer.max = max(timer.max, max_seconds)
+        for name, value in state["counters"].items():
+            self.increment(name, value)
+    
+    def to_dict(self) -> dict:
+        """Summary: per timer count, total, mean, percentiles and max; counters"""
+        timers = {}
+        for name, t in sorted(self.timers.items()):
+            summary = {
+                "count": t.count,
+                "total_seconds": t.total,
+                "mean_seconds": t.total / t.count if t.count else 0.0,
+            }
+            for q in self.PERCENTILES:
+                summary[f"p{q}_seconds"] = t.percentile(q)
+            summary["max_seconds"] = t.max
+            timers[name] = summary
+        return {"timers": timers, "counters": dict(sorted(self.counters.items()))}
+    
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+    
+    def to_prometheus(self, prefix: str = MetricsConfig.PROMETHEUS_PREFIX) -> str:
+        """Prometheus text exposition format: timers as summaries"""
+        lines = []
+        for name, t in sorted(self.timers.items()):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for q in self.PERCENTILES:
+                lines.append(f'{metric}{{quantile="{q / 100}"}} {t.percentile(q):.6f}')
+            lines.append(f"{metric}_sum {t.total:.6f}")
+            lines.append(f"{metric}_count {t.count}")
+        for name, value in sorted(self.counters.items()):
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def active_registry():
+    """The registry recording in this context, or None"""
+    return _active.get()
+
+
+def timer(name: str):
+    """Context manager timing a block into the active registry, if any"""
+    registry = _active.get()
+    return _NULL_TIMER if registry is None else registry.timer(name)
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call into the active registry, if any"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            registry = _active.get()
+            if registry is None:
+                return func(*args, **kwargs)
+            with registry.timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def increment(name: str, value: float = 1):
+    """Add to a counter in the active registry, if any"""
+    registry = _active.get()
+    if registry is not None:
+        registry.increment(name, value)
\ No newline at end of file
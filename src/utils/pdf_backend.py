@@ -0,0 +1,16 @@
+"""PDF Backend Module"""
+
+# PyMuPDF is imported here once; modules that draw or read PDFs use this
+# `fitz` and call require_pymupdf() before touching it
+try:
+    import fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    fitz = None
+    PYMUPDF_AVAILABLE = False
+
+
+def require_pymupdf():
+    """Raise ImportError if PyMuPDF is not installed"""
+    if not PYMUPDF_AVAILABLE:
+        raise ImportError("PyMuPDF required. Install: pip install PyMuPDF")
@@ -0,0 +1,79 @@
+"""Text Fitting Utilities"""
+
+import math
+from functools import lru_cache
+from typing import Tuple
+
+from config.settings import FieldConfig
+from src.utils.font_registry import FontRegistry
+
+try:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+
+class TextFitter:
+    """Fit text into a width using real font metrics"""
+    
+    ELLIPSIS = "..."
+    
+    @staticmethod
+    @lru_cache(maxsize=FieldConfig.TEXT_WIDTH_CACHE_SIZE)
+    def text_width(text: str, font_name: str, font_size: float) -> float:
+        """Width of `text` in points"""
+        font = FontRegistry.font(font_name, text)
+        if font is not None:
+            return font.text_length(text, fontsize=font_size)
+        if REPORTLAB_AVAILABLE:
+            try:
+                return stringWidth(text, font_name, font_size)
+            except KeyError:
+                pass  # font not registered with ReportLab
+        # Rough average for proportional fonts
+        return len(text) * font_size * 0.6
+    
+    @staticmethod
+    def fit(text: str,
+            max_width: float,
+            font_name: str = FieldConfig.DEFAULT_FONT_NAME,
+            font_size: float = FieldConfig.DEFAULT_FONT_SIZE,
+            shrink: bool = False,
+            min_font_size: float = FieldConfig.MIN_FONT_SIZE) -> Tuple[str, float]:
+        """
+        Make `text` fit within `max_width` points.
+        With `shrink`, the font size is reduced first (down to `min_font_size`);
+        text that still does not fit is truncated with an ellipsis.
+        Returns (text, font size).
+        """
+        width = TextFitter.text_width(text, font_name, font_size)
+        if not max_width or width <= max_width:
+            return text, font_size
+        
+        if shrink:
+            # Widths scale linearly with size; round down to 0.1pt
+            size = math.floor(font_size * max_width / width * 10) / 10
+            if size >= min_font_size:
+                return text, size
+            font_size = min_font_size
+        
+        return TextFitter.truncate(text, max_width, font_name, font_size), font_size
+    
+    @staticmethod
+    def truncate(text: str, max_width: float, font_name: str, font_size: float) -> str:
+        """Longest prefix of `text` plus an ellipsis that fits, by binary search"""
+        ellipsis = TextFitter.ELLIPSIS
+        if TextFitter.text_width(ellipsis, font_name, font_size) > max_width:
+            return ""
+        
+        # Invariant: text[:low] + ellipsis fits, text[:high + 1] + ellipsis does not
+        low, high = 0, len(text) - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if TextFitter.text_width(text[:mid] + ellipsis, font_name, font_size) <= max_width:
+                low = mid
+            else:
+                high = mid - 1
+        
+        return text[:low].rstrip() + ellipsis
\ No newline at end of file
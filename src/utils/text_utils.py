@@ -1,7 +1,10 @@
 """Text Processing Utilities"""
 
+import re
+import numpy as np
 import pandas as pd
-from typing import Any
+from typing import Any, Tuple
+from src.utils.text_fitter import TextFitter
 
 
 class TextUtils:
@@ -31,15 +34,95 @@ class TextUtils:
             return str(value)
     
     @staticmethod
-    def truncate_to_width(text: str, max_width: int, font_size: int) -> str:
-        """Truncate text to fit width"""
+    def format_column(values: pd.Series, field_type: str) -> np.ndarray:
+        """
+        `format_value` for a whole column at once, as an object array of str.
+        Checkboxes, dates and string columns are formatted vectorized; other
+        values repeat heavily (amounts, rates, codes), so each distinct value
+        is formatted once and mapped back.
+        """
+        missing = values.isna().to_numpy()
+        
+        if field_type == "checkbox":
+            # As object values, so nullable dtypes (Int64, string) take False too
+            checked = np.where(missing, False, values.to_numpy(dtype=object)).astype(bool)
+            return np.where(checked, "✓", "").astype(object)
+        
+        if field_type == "date" and pd.api.types.is_datetime64_any_dtype(values):
+            formatted = values.dt.strftime("%d-%m-%Y")
+        elif field_type in ("text", "date") and isinstance(values.dtype, pd.StringDtype):
+            formatted = values
+        elif values.dtype == object:
+            # Equal values of different types (True, 1, 1.0) can format differently
+            present = values.to_numpy()[~missing]
+            keys = list(zip(map(type, present), present))
+            lookup = {key: TextUtils.format_value(key[1], field_type) for key in set(keys)}
+            formatted = np.full(len(values), "", dtype=object)
+            formatted[~missing] = [lookup[key] for key in keys]
+            return formatted
+        else:
+            lookup = {value: TextUtils.format_value(value, field_type)
+                      for value in values[~missing].unique()}
+            formatted = values.map(lookup)
+        
+        return np.where(missing, "", formatted.to_numpy(dtype=object))
+    
+    @staticmethod
+    def truncate_to_width(text: str, max_width: int, font_size: int,
+                          font_name: str = "Helvetica") -> str:
+        """Truncate text to fit width (in points), using the font's metrics"""
         if max_width is None:
             return text
         
-        avg_char_width = font_size * 0.6
-        max_chars = int(max_width / avg_char_width)
+        return TextFitter.fit(text, max_width, font_name, font_size)[0]
+    
+    @staticmethod
+    def split_string(text: str, separator: str = ' ', max_len: int = 50) -> list:
+        """Split `text` at `separator` into chunks of at most `max_len`, re-joined with spaces"""
+        words = text.split(separator)
+        parts = []
+        current = ""
+        
+        for word in words:
+            # If adding this word exceeds limit, push current and start new chunk
+            if len(current) + len(word) + (1 if current else 0) > max_len:
+                parts.append(current)
+                current = word
+            else:
+                current = word if not current else current + " " + word
         
-        if len(text) <= max_chars:
-            return text
+        # Append last part if non-empty
+        if current:
+            parts.append(current)
+        
+        return parts
+    
+    @staticmethod
+    def split_column(values: pd.Series, separator: str = ' ', max_len: int = 50) -> Tuple[pd.Series, pd.Series]:
+        """
+        First and second chunks of `split_string` for a whole column, in
+        one regex pass. Chunks are re-joined with spaces.
+        """
+        sep = re.escape(separator)
+        # Chunk 1: longest run of whole words within max_len (leading
+        # separators skipped). Chunk 2: the same for the rest, or just its
+        # first word when that alone is longer than max_len.
+        pattern = (rf'\A{sep}*(?:(?P<first>.{{1,{max_len}}})(?={sep}|\Z))?'
+                   rf'{sep}*(?P<second>.{{1,{max_len}}}(?={sep}|\Z)|[^{sep}]+)?')
+        
+        parts = values.str.extract(pattern, flags=re.DOTALL).fillna('')
+        first, second = parts['first'], parts['second']
+        
+        # Consecutive separators can make split_string emit an empty chunk
+        # the pattern does not reproduce; those (rare) rows are split one by one
+        doubled = values.str.contains(separator * 2, regex=False).fillna(False).astype(bool)
+        if doubled.any():
+            chunks = values[doubled].map(lambda text: TextUtils.split_string(text, separator, max_len))
+            first[doubled] = chunks.map(lambda c: c[0] if c else '')
+            second[doubled] = chunks.map(lambda c: c[1] if len(c) > 1 else '')
+        
+        if separator != ' ':
+            first = first.str.replace(separator, ' ', regex=False)
+            second = second.str.replace(separator, ' ', regex=False)
         
-        return text[:max_chars-3] + "..."
\ No newline at end of file
+        return first, second
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""Per-entry STORED/DEFLATED choice and threaded compression"""
+
+import io
+import os
+import zipfile
+
+import pytest
+
+from src.utils.archive_writer import ArchiveWriter
+
+
+class Unseekable(io.RawIOBase):
+    """A write-only stream like a pipe or an HTTP response"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+def entries():
+    """(name, data, compressible) with small, sampled and large entries of each kind"""
+    text = b"LABUAN ENTITY FORM LE1 FIELD VALUE 12345 " * 4000
+    for i in range(5):
+        yield f"text_{i}.pdf", text[:1000 * (i + 1) ** 3], True
+        yield f"random_{i}.pdf", os.urandom(1000 * (i + 1) ** 3), False
+
+
+@pytest.mark.parametrize("seekable", [True, False], ids=["seekable", "unseekable"])
+def test_entries_are_stored_or_deflated_by_content(seekable):
+    expected = list(entries())
+    file_obj = io.BytesIO() if seekable else Unseekable()
+
+    with ArchiveWriter(file_obj, workers=3) as archive:
+        for name, data, _ in expected:
+            archive.add(name, data)
+
+    data = file_obj.getvalue() if seekable else file_obj.buffer.getvalue()
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == [name for name, _, _ in expected]
+        for name, content, compressible in expected:
+            info = archive.getinfo(name)
+            assert info.compress_type == (zipfile.ZIP_DEFLATED if compressible else zipfile.ZIP_STORED), name
+            assert archive.read(name) == content
+
+
+def test_stats_count_each_kind():
+    file_obj = io.BytesIO()
+    expected = list(entries())
+    with ArchiveWriter(file_obj, workers=2) as archive:
+        for name, data, _ in expected:
+            archive.add(name, data)
+
+    stats = archive.stats
+    assert stats.entries == len(expected)
+    assert stats.deflated == sum(compressible for _, _, compressible in expected)
+    assert stats.stored == len(expected) - stats.deflated
+    assert stats.input_bytes == sum(len(data) for _, data, _ in expected)
+    assert stats.output_bytes < stats.input_bytes
@@ -0,0 +1,84 @@
+"""Render cache read-ahead: row order, and how far input is read ahead"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core import batch_generator
+from src.core.batch_generator import BatchGenerator
+from src.core.render_cache import RenderCache
+
+
+class CountingRows:
+    """Rows ('row <i>',) that count how many have been read"""
+
+    def __init__(self, count: int):
+        self.count = count
+        self.read = 0
+
+    def __iter__(self):
+        for i in range(self.count):
+            self.read += 1
+            yield (f"row {i}",)
+
+
+def render(row) -> bytes:
+    return row[0].encode()
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    """A generator that renders a row as its text, without a background"""
+    monkeypatch.setattr(RenderCache, "batch_key", staticmethod(lambda background, plan: "batch"))
+    monkeypatch.setattr(batch_generator, "_render_chunk", lambda rows: ([render(r) for r in rows], None))
+    monkeypatch.setattr(BatchGenerator, "_render", lambda self, row: render(row))
+    monkeypatch.setattr(BatchGenerator, "_start_pool", lambda self, collect_metrics: ThreadPoolExecutor(3))
+
+    generator = BatchGenerator.__new__(BatchGenerator)
+    generator.background = generator.plan = None
+    generator.chunk_size = 5
+    generator.max_in_flight = 2
+    generator.cache = RenderCache(tmp_path)
+    return generator
+
+
+def fill_cache(generator, rows):
+    for row in rows:
+        generator.cache.put(RenderCache.fingerprint("batch", row), render(row))
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_cached_rows_are_yielded_straight_away(generator, workers):
+    generator.workers = workers
+    rows = CountingRows(1000)
+    fill_cache(generator, rows)
+    rows.read = 0
+
+    pdfs = generator.generate(rows)
+    assert next(pdfs) == b"row 0"
+    assert rows.read == 1
+    assert list(pdfs)[-1] == b"row 999"
+    assert generator.reused == 1000
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+@pytest.mark.parametrize("cached", [
+    lambda i: i % 2 == 0,
+    lambda i: i % 17 != 0,
+    lambda i: i < 40,
+    lambda i: i >= 40,
+], ids=["alternate", "sparse-misses", "cached-head", "cached-tail"])
+def test_mixed_rows_keep_order_and_bounded_lookahead(generator, workers, cached):
+    generator.workers = workers
+    rows = CountingRows(100)
+    fill_cache(generator, [(f"row {i}",) for i in range(100) if cached(i)])
+    lookahead = generator.max_in_flight * generator.chunk_size
+
+    pdfs = []
+    for pdf in generator.generate(rows):
+        pdfs.append(pdf)
+        # Reading ahead never runs further than the lookahead past the output
+        assert rows.read <= len(pdfs) + lookahead
+    assert pdfs == [f"row {i}".encode() for i in range(100)]
+    assert generator.reused == sum(map(cached, range(100)))
+    assert generator.rendered == 100 - generator.reused
@@ -0,0 +1,45 @@
+"""Day-first date parsing with explicit formats"""
+
+import pandas as pd
+import pytest
+
+from src.io.date_parser import DateParser
+
+
+@pytest.mark.parametrize("text", ["07/04/2011", "07/04/2011\xa0", " 07/04/2011 "],
+                         ids=["plain", "trailing-nbsp", "spaces"])
+def test_slash_dates_are_day_first(text):
+    parsed = DateParser.parse(pd.Series([text, "13/04/2011"]), "A7")
+    assert parsed.tolist() == [pd.Timestamp(2011, 4, 7), pd.Timestamp(2011, 4, 13)]
+
+
+def test_inferred_formats_are_day_first():
+    values = pd.Series(["07/04/2011", "07/04/2011\xa0", "01/02/2003"])
+    assert DateParser.infer_formats(values.str.strip())[0] == "%d/%m/%Y"
+
+
+def test_mixed_iso_and_slash_dates():
+    values = pd.Series(["2011-04-07", "08/04/2011", "09/04/2011\xa0", None, "", "2011-04-10"])
+    parsed = DateParser.parse(values, "A7")
+    assert parsed.tolist()[:3] == [pd.Timestamp(2011, 4, 7), pd.Timestamp(2011, 4, 8),
+                                   pd.Timestamp(2011, 4, 9)]
+    assert parsed[[3, 4]].isna().all()
+    assert parsed[5] == pd.Timestamp(2011, 4, 10)
+
+
+def test_excel_dates_are_kept():
+    values = pd.Series([pd.Timestamp(2011, 4, 7).to_pydatetime(), "08/04/2011"], dtype=object)
+    assert DateParser.parse(values, "A7").tolist() == [pd.Timestamp(2011, 4, 7), pd.Timestamp(2011, 4, 8)]
+
+
+def test_unmatched_rows_are_reported():
+    values = pd.Series(["07/04/2011", "April 7th", "31/02/2011", "08/04/2011"] + ["nope"] * 6)
+    with pytest.raises(ValueError) as error:
+        DateParser.parse(values, "A7")
+    message = str(error.value)
+    # Spreadsheet rows: a header row, then data from row 2
+    assert "A7" in message
+    assert "row 3: 'April 7th'" in message
+    assert "row 4: '31/02/2011'" in message
+    assert "row 2:" not in message and "row 5:" not in message
+    assert "and 3 more" in message
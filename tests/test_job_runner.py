@@ -0,0 +1,48 @@
+"""Partial output of jobs that stopped before their last row"""
+
+import os
+import zipfile
+
+from src.core.job_runner import Job, JobStore, ResumableZip
+
+
+def test_killed_zip_job_serves_last_checkpoint(tmp_path):
+    store = JobStore(tmp_path)
+    job = Job(job_id="job", total=4, output="zip", status="interrupted")
+    (tmp_path / job.job_id).mkdir()
+    path = store.output_path(job)
+
+    writer = ResumableZip(path)
+    writer.add("a.pdf", b"%PDF a")
+    writer.add("b.pdf", b"%PDF b")
+    job.checkpoint = writer.checkpoint()
+    # Killed before the next checkpoint: entries but no central directory
+    writer.add("c.pdf", os.urandom(4096))
+    writer.archive._write_next()
+    writer.file.flush()
+
+    with open(path, 'rb') as f:
+        assert not zipfile.is_zipfile(f)
+
+    with store.open_output(job) as f, zipfile.ZipFile(f) as archive:
+        assert archive.namelist() == ["a.pdf", "b.pdf"]
+        assert archive.read("b.pdf") == b"%PDF b"
+        assert archive.testzip() is None
+    writer.abort()
+
+
+def test_resumed_zip_keeps_archive_stats(tmp_path):
+    path = tmp_path / "output.zip"
+    writer = ResumableZip(path)
+    writer.add("a.pdf", b"%PDF a")
+    writer.add("b.pdf", b"%PDF b")
+    state = writer.checkpoint()
+    writer.close(resumable=True)
+
+    writer = ResumableZip(path, state)
+    writer.add("c.pdf", b"%PDF c")
+    assert writer.close() == 3
+    assert writer.stats.entries == 3
+    assert writer.stats.input_bytes == 18
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ["a.pdf", "b.pdf", "c.pdf"]
@@ -0,0 +1,40 @@
+"""Render cache size limit"""
+
+import os
+
+from src.core.render_cache import RenderCache
+
+
+def cached_bytes(cache: RenderCache) -> int:
+    return sum(path.stat().st_size for path in cache.directory.glob("*/*.pdf"))
+
+
+def test_size_limit_is_kept_while_writing(tmp_path):
+    cache = RenderCache(tmp_path, max_bytes=10_000)
+    fingerprints = [f"{i:02x}" * 32 for i in range(30)]
+    for i, fp in enumerate(fingerprints):
+        cache.put(fp, b"x" * 1000)
+        # Written files get distinct, increasing modification times
+        os.utime(cache._path(fp), (i, i))
+        assert cached_bytes(cache) <= cache.max_bytes
+
+    # The most recently written files are the ones kept
+    kept = [fp for fp in fingerprints if cache.contains(fp)]
+    assert kept == fingerprints[-len(kept):]
+    assert len(kept) >= 9
+
+
+def test_recently_read_files_outlive_older_ones(tmp_path):
+    cache = RenderCache(tmp_path, max_bytes=5_000)
+    first, *rest = [f"{i:02x}" * 32 for i in range(6)]
+    cache.put(first, b"x" * 1000)
+    os.utime(cache._path(first), (0, 0))
+    for i, fp in enumerate(rest[:3], start=1):
+        cache.put(fp, b"x" * 1000)
+        os.utime(cache._path(fp), (i, i))
+
+    assert cache.get(first) == b"x" * 1000
+    cache.put(rest[3], b"x" * 1000)
+    cache.put(rest[4], b"x" * 1000)
+    assert cache.contains(first)
+    assert not cache.contains(rest[0])
@@ -0,0 +1,172 @@
+"""Regression tests: column-wise processing against the original row-wise code"""
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_le1 import make_le1_frame
+from config.settings import SAMPLES_DIR
+from src.io.spreadsheet_processor import SpreadsheetProcessor
+from src.utils.text_utils import TextUtils
+
+SAMPLE = SAMPLES_DIR / "sample_data_form_le1.xlsx"
+
+LEGACY_STATES = [
+    "JOHOR", "KEDAH", "KELANTAN", "MELAKA", "NEGERI SEMBILAN", "PAHANG", "PULAU PINANG",
+    "PERAK", "PERLIS", "SABAH", "SARAWAK", "SELANGOR", "TERENGGANU",
+    "WILAYAH PERSEKUTUAN KUALA LUMPUR", "WILAYAH PERSEKUTUAN PUTRAJAYA",
+    "WILAYAH PERSEKUTUAN LABUAN", "FEDERAL TERRITORY OF LABUAN"
+]
+
+
+def legacy_split_string(text, separator=' ', max_len=50):
+    """SpreadsheetProcessor.split_string as first released"""
+    words = text.split(separator)
+    parts = []
+    current = ""
+    for word in words:
+        if len(current) + len(word) + (1 if current else 0) > max_len:
+            parts.append(current)
+            current = word
+        else:
+            current = word if not current else current + " " + word
+    if current:
+        parts.append(current)
+    return parts
+
+
+def legacy_extract_state(address):
+    """SpreadsheetProcessor.extract_state as first released"""
+    for state in LEGACY_STATES:
+        if state in address:
+            return state
+    return None
+
+
+def legacy_spaced(values: pd.Series, width: int, separator: str) -> pd.Series:
+    return values.apply(lambda x: separator.join(list(str(x).zfill(width))))
+
+
+def legacy_address(df: pd.DataFrame, col: str):
+    """<col>_address_1/2, _postcode, _state and _city as first released"""
+    line = df[col].str.extract(r'^(.*?)(?=\b\d{5}\b)', expand=False).str.strip()
+    split = line.str.upper().apply(lambda x: legacy_split_string(x, separator=',', max_len=62))
+    df[f'{col}_address_1'] = split.apply(lambda x: x[0].strip().replace('  ', ', '))
+    df[f'{col}_address_2'] = split.apply(lambda x: x[1].strip().replace('  ', ', ') if len(x) > 1 else '')
+    df[f'{col}_postcode'] = df[col].str.extract(r'(\b\d{5}\b)', expand=False)
+    state = df[col].apply(legacy_extract_state)
+    df[f'{col}_city'] = [address.replace(a, '').replace(p, '').replace(s, '').strip()
+                         for address, a, p, s in zip(df[col], line, df[f'{col}_postcode'], state)]
+    df[f'{col}_state'] = state.replace({"WILAYAH PERSEKUTUAN": "W.P.",
+                                        "FEDERAL TERRITORY OF": "F.T."}, regex=True)
+
+
+def legacy_process_file(df: pd.DataFrame) -> pd.DataFrame:
+    """SpreadsheetProcessor.process_file as first released, per row"""
+    df.columns = df.columns.str.strip()
+
+    for i in range(4):
+        df[f'year_{i + 1}'] = df['Tahun Taksiran'].astype(str)[0][i]
+
+    name = df['A1'].str.upper().apply(lambda x: legacy_split_string(x, max_len=52))
+    df['A1_1'] = name.apply(lambda x: x[0])
+    df['A1_2'] = name.apply(lambda x: x[1] if len(x) > 1 else '')
+
+    legacy_address(df, 'A2')
+    df['A3'] = df['A3'].str.extract(r'(\d+)', expand=False)
+
+    for col in ['A10', 'A11']:
+        df[[f'{col}_from', f'{col}_to']] = df[col].str.split(' hingga ', n=1, expand=True)
+        for end in ['from', 'to']:
+            dates = pd.to_datetime(df[f'{col}_{end}'], format='%d-%m-%Y')
+            df[f'{col}_{end}_day'] = legacy_spaced(dates.dt.day, 2, '  ')
+            df[f'{col}_{end}_month'] = legacy_spaced(dates.dt.month, 2, '  ')
+            df[f'{col}_{end}_year'] = legacy_spaced(dates.dt.year, 4, '   ')
+
+    df['A14'] = df['A14'].apply(lambda x: '{:.4f}'.format(x) if pd.notnull(x) else x)
+
+    legacy_address(df, 'C1')
+    df['C1_country'] = 'MALAYSIA'
+
+    df.columns = df.columns.str.replace('\n', ' ')
+    return df
+
+
+def load_sample() -> pd.DataFrame:
+    df = pd.read_excel(SAMPLE)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+# A7 dates are now read day-first whatever their format (user-023), where
+# the original let pandas guess per file and could swap day and month
+CHANGED_COLUMNS = ['A7_day', 'A7_month', 'A7_year']
+
+
+def state_repeated(addresses: pd.Series) -> pd.Series:
+    """
+    Addresses naming their state twice, e.g. '81100 JOHOR BAHRU JOHOR'. The
+    original removed every occurrence from the city ('BAHRU'); the city now
+    keeps its full name (user-008)
+    """
+    return pd.Series([address.count(legacy_extract_state(address) or "\0") > 1
+                      for address in addresses], index=addresses.index)
+
+
+def assert_matches_legacy(df: pd.DataFrame):
+    processed = SpreadsheetProcessor.process_file(df.copy())
+    legacy = legacy_process_file(df.copy())
+    for col in SpreadsheetProcessor.OUTPUT_COLUMNS:
+        if col in CHANGED_COLUMNS:
+            continue
+        rows = ~state_repeated(df[col[:2]]) if col.endswith('_city') else slice(None)
+        actual = processed.loc[rows, col].astype(object)
+        expected = legacy.loc[rows, col].astype(object)
+        assert actual.where(actual.notna(), None).tolist() == expected.where(expected.notna(), None).tolist(), col
+
+
+def test_sample_matches_legacy():
+    assert_matches_legacy(load_sample())
+
+
+def test_synthetic_rows_match_legacy():
+    assert_matches_legacy(make_le1_frame(500, seed=1))
+
+
+@pytest.mark.parametrize("name, address_line", [
+    # A full first chunk, consecutive separators, then a word longer than
+    # max_len: the original emitted an empty second chunk
+    ("A" * 52 + "  " + "B" * 60, "U" * 62 + ",," + "V" * 70),
+    ("SHORT  " + "B" * 60 + " TAIL", "UNIT 1,, " + "V" * 70 + ", JALAN"),
+    ("  LEADING  AND   DOUBLE  SPACES", ",UNIT 1,,JALAN MERDEKA,,"),
+    ("C" * 60, "W" * 70),
+], ids=["full-chunk-then-long-word", "short-then-long-word", "leading-and-doubled", "single-long-word"])
+def test_consecutive_separators_match_legacy(name, address_line):
+    df = load_sample()
+    df.loc[0, 'A1'] = name
+    df.loc[0, 'A2'] = df.loc[0, 'C1'] = f"{address_line} 87000 LABUAN FEDERAL TERRITORY OF LABUAN"
+    assert_matches_legacy(df)
+
+
+def test_split_column_matches_split_string():
+    values = pd.Series(["A" * 10 + "  " + "B" * 20, "X  Y", "", "A" * 11, "AA BB  CC"])
+    first, second = TextUtils.split_column(values, max_len=10)
+    expected = [legacy_split_string(v, max_len=10) for v in values]
+    assert first.tolist() == [e[0] if e else '' for e in expected]
+    assert second.tolist() == [e[1] if len(e) > 1 else '' for e in expected]
+
+
+def test_year_comes_from_first_row_of_file():
+    df = pd.DataFrame({'Tahun Taksiran': [2024, 2023, 2022, 2021]})
+    chunks = [df.iloc[:2].copy(), df.iloc[2:].copy()]
+    year_columns = ['year_1', 'year_2', 'year_3', 'year_4']
+    processed = pd.concat([processed for _, processed in
+                           SpreadsheetProcessor.process_chunks(chunks, columns=year_columns)])
+    assert processed.apply(''.join, axis=1).tolist() == ['2024'] * 4
+
+
+def test_address_over_several_lines():
+    df = load_sample().head(1)
+    df['A2'] = "UNIT 1, JALAN MERDEKA, 87000 LABUAN,\nWILAYAH PERSEKUTUAN LABUAN"
+    parts = ['A2_address_1', 'A2_address_2', 'A2_postcode', 'A2_city', 'A2_state']
+    processed = SpreadsheetProcessor.process_file(df, columns=parts)
+    assert processed.iloc[0].tolist() == ["UNIT 1, JALAN MERDEKA", "", "87000", "LABUAN,", "W.P. LABUAN"]
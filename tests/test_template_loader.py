@@ -0,0 +1,49 @@
+"""Template CSV parsing and its on-disk cache"""
+
+import pytest
+
+from config.settings import CacheConfig, TEMPLATES_DIR
+from src.io.template_loader import TemplateLoader
+
+TEMPLATE = TEMPLATES_DIR / "coordinate_template.csv"
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "template_cache"
+    monkeypatch.setattr(CacheConfig, "TEMPLATE_CACHE_DIR", directory)
+    return directory
+
+
+def test_cached_load_matches_parse(cache_dir):
+    parsed = TemplateLoader.from_csv(TEMPLATE, cache=False)
+    first = TemplateLoader.from_csv(TEMPLATE, cache=True)
+    assert len(list(cache_dir.glob("*.pkl"))) == 1
+    cached = TemplateLoader.from_csv(TEMPLATE, cache=True)
+    assert first == parsed
+    assert cached == parsed
+
+
+def test_edited_csv_is_parsed_again(cache_dir, tmp_path):
+    path = tmp_path / "template.csv"
+    path.write_bytes(TEMPLATE.read_bytes())
+    before = TemplateLoader.from_csv(path, cache=True)
+
+    # Same size, and possibly the same mtime: the cache is keyed by content
+    path.write_text(path.read_text().replace("year_1,0,880,325", "year_1,0,881,325"))
+    after = TemplateLoader.from_csv(path, cache=True)
+    assert after == TemplateLoader.from_csv(path, cache=False)
+    assert after.fields[0].x == 881 and before.fields[0].x == 880
+    assert len(list(cache_dir.glob("*.pkl"))) == 2
+
+
+def test_corrupt_cache_file_is_parsed_again(cache_dir):
+    expected = TemplateLoader.from_csv(TEMPLATE, cache=False)
+    TemplateLoader.from_csv(TEMPLATE, cache=True)
+    (cached,) = cache_dir.glob("*.pkl")
+    cached.write_bytes(b"not a pickle")
+
+    assert TemplateLoader.from_csv(TEMPLATE, cache=True) == expected
+    # Replaced by a good copy
+    assert TemplateLoader.from_csv(TEMPLATE, cache=True) == expected
+    assert cached.read_bytes() != b"not a pickle"
@@ -0,0 +1,32 @@
+"""Column-wise formatting against the per-value original"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.text_utils import TextUtils
+
+
+def assert_matches_format_value(values: pd.Series, field_type: str):
+    expected = [TextUtils.format_value(value, field_type) for value in values]
+    assert TextUtils.format_column(values, field_type).tolist() == expected
+
+
+@pytest.mark.parametrize("values, field_type", [
+    ([1.0, 1], "date"),
+    ([True, 1, 1.0, None], "text"),
+    ([1.5, True, "1", np.nan], "number"),
+], ids=["float-and-int", "bool-int-float", "mixed-number"])
+def test_equal_values_of_different_types(values, field_type):
+    assert_matches_format_value(pd.Series(values, dtype=object), field_type)
+
+
+@pytest.mark.parametrize("dtype, values", [
+    ("Int64", [1, None, 0]),
+    ("Float64", [0.5, None, 0.0]),
+    ("boolean", [True, None, False]),
+    ("string", ["x", None, ""]),
+    ("float64", [1.0, np.nan, 0.0]),
+])
+def test_checkbox_with_missing_values(dtype, values):
+    assert_matches_format_value(pd.Series(values, dtype=dtype), "checkbox")